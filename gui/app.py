@@ -1,19 +1,17 @@
 """GUI – Szuper Írógép — GUI MVP (Step6 Komfort integráció)
 - Nem használ hálózatot / külső folyamatot.
 - Futáskor a runner.run.run_once(...) lokálisan csomagol és bizonyítékot készít az out/ alá.
+- Hidegindítás: a runner / cookbook / előzmények csak az első képkocka után töltődnek be
+  (háttérszálon), a ttkbootstrap csak main()-ben; időmérés: gui.startup.
 """
 from __future__ import annotations
 import tkinter as tk
 from tkinter import ttk
-from typing import Optional, List
-import threading, json
+from typing import Optional, List, TYPE_CHECKING
+import queue, threading
 from pathlib import Path
-from datetime import datetime, timezone
 
-try:
-    import ttkbootstrap as tb  # type: ignore
-except Exception:
-    tb = None  # type: ignore
+from gui import startup
 
 try:
     from gui import ids
@@ -35,13 +33,33 @@ except Exception:
         def set_visible(*_a, **_k): pass
         @staticmethod
         def get_text(): return ""
+        @staticmethod
+        def lines_since(_c): return [], 0
     hood = _H()  # type: ignore
 
-# Preferált integráció a runner-rel
-from runner.run import run_once, RunResult  # type: ignore
+# Preferált integráció a runner-rel – lusta import (ld. _load_deferred / _get_scheduler)
+if TYPE_CHECKING:
+    from runner.scheduler import Scheduler, JobInfo
+    from runner.progress import ProgressEvent
+from gui.logview import LogView
+
+BASE_DIR = Path(__file__).resolve().parents[1]
 
 APP_TITLE = f"{ids.APP_NAME} v{getattr(ids,'APP_VERSION','?')} — GUI MVP"
 
+# Haladásjelző: fázisonkénti kiindulási érték (%), a csomagolás a package→evidence sávot tölti
+PROGRESS_POLL_MS = 50
+# Tervrajz-mező: gépelés utáni állapotfrissítés késleltetése
+PASTE_DEBOUNCE_MS = 150
+PHASE_PROGRESS = {"preflight": 2, "fingerprint": 5, "package": 10, "evidence": 95, "done": 100}
+PHASE_LABELS = {"preflight": "Előkészítés", "fingerprint": "Változások keresése",
+                "package": "Csomagolás", "evidence": "Ellenőrzés", "done": "Kész"}
+
+# Napló-panelek sorlimitje (a legrégebbi sorok törlődnek)
+RUN_LOG_MAX_LINES = 5000
+HOOD_MAX_LINES = 10000
+HOOD_PLACEHOLDER = "Itt jelennek meg a parancsok és a részletes logok."
+
 class App(ttk.Frame):
     def __init__(self, master: tk.Misc) -> None:
         super().__init__(master, padding=8)
@@ -52,8 +70,16 @@ class App(ttk.Frame):
             master.title(APP_TITLE)
 
         self._running: bool = False
+        # Futások az ütemezőn; a felület mindig a legutóbb indított (_job_id) futást mutatja,
+        # a korábbiak a háttérben futnak tovább (Stop: a látható futás, Stop (mind): mindegyik)
+        self._scheduler: Optional["Scheduler"] = None  # első futáskor jön létre
+        self._job_id: Optional[str] = None
         self._scheduled: list[int] = []
         self._last_next_hint: str = ""
+        # Tervrajz-mező: módosítás-számláló (ütközésfigyelés a háttér-tisztításhoz) + debounce
+        self._paste_rev: int = 0
+        self._paste_after: Optional[str] = None
+        self._sanitizing: bool = False
         self._history_lines: List[str] = []
 
         header = ttk.Frame(self); header.pack(fill="x", pady=(0,6))
@@ -80,9 +106,12 @@ class App(ttk.Frame):
         runbar = ttk.Frame(card2); runbar.pack(fill="x", padx=6, pady=(6,0))
         self.btn_run = ttk.Button(runbar, text="Futtatás", command=self.on_run, width=16, takefocus=False); self.btn_run.pack(side="left")
         self.btn_stop = ttk.Button(runbar, text="Stop", command=self.on_stop, width=10, takefocus=False); self.btn_stop.pack(side="left", padx=(6,0))
+        # A Stop a látható (legutóbbi) futást állítja le; ez a háttérben futókat és sorban állókat is
+        self.btn_stop_all = ttk.Button(runbar, text="Stop (mind)", command=self.on_stop_all, width=12, takefocus=False); self.btn_stop_all.pack(side="left", padx=(6,0))
         self.prog = ttk.Progressbar(runbar, mode="determinate", maximum=100); self.prog.pack(fill="x", expand=True, side="left", padx=(12,0))
         self.run_log = tk.Text(card2, height=10, wrap="word", name=getattr(ids, "RAW_OUTPUT", "#raw-output")); self.run_log.pack(fill="both", expand=True, padx=6, pady=6)
-        ttk.Button(card2, text="Másolás (Futási napló)", command=lambda: self._copy(self.run_log.get("1.0","end-1c")), takefocus=False).pack(anchor="e", padx=6, pady=(0,6))
+        self.run_view = LogView(self.run_log, RUN_LOG_MAX_LINES)
+        ttk.Button(card2, text="Másolás (Futási napló)", command=lambda: self._copy(self.run_view.get_text()), takefocus=False).pack(anchor="e", padx=6, pady=(0,6))
 
         # 3) EREDMÉNY & BIZONYÍTÉK
         card3 = ttk.LabelFrame(self, text="3) EREDMÉNY & BIZONYÍTÉK"); card3.pack(fill="both", expand=False)
@@ -110,11 +139,64 @@ class App(ttk.Frame):
         # Motorháztető
         self.hood_frame = ttk.LabelFrame(self, text="Motorháztető (részletes napló)")
         self.hood_text = tk.Text(self.hood_frame, height=10, wrap="none"); self.hood_text.pack(fill="both", expand=True, padx=6, pady=6)
-        ttk.Button(self.hood_frame, text="Másolás (Motorháztető)", command=lambda: self._copy(self.hood_text.get("1.0","end-1c")), takefocus=False).pack(anchor="e", padx=6, pady=(0,6))
+        self.hood_view = LogView(self.hood_text, HOOD_MAX_LINES)
+        self._hood_cursor = 0  # hood.lines_since: eddig megjelenített naplósorok
+        # Helyőrző csak amíg a panel üres: az első valódi sor előtt törlődik (_hood_extend)
+        self.hood_view.append(HOOD_PLACEHOLDER)
+        self._hood_placeholder = True
+        ttk.Button(self.hood_frame, text="Másolás (Motorháztető)", command=lambda: self._copy(self.hood_view.get_text()), takefocus=False).pack(anchor="e", padx=6, pady=(0,6))
         self._render_hood_visibility(initial=True)
 
         self._update_run_enabled()
-        self._refresh_history_ui()
+        ttk.Label(self.history_list, text="Betöltés…", foreground="#888").pack(anchor="w")
+        # Előzmények, runner, cookbook: az első képkocka után (ld. _on_first_map)
+        self._deferred_done = False
+        self.bind("<Map>", self._on_first_map, add="+")
+
+    # ---------- Késleltetett betöltés ----------
+    def _on_first_map(self, _evt=None) -> None:
+        if self._deferred_done: return
+        self._deferred_done = True
+        # Az after_idle a Map utáni újrarajzolás után fut: ez az első képkocka
+        self.after_idle(self._after_first_frame)
+
+    def _after_first_frame(self) -> None:
+        startup.first_frame()
+        threading.Thread(target=self._load_deferred, daemon=True).start()
+
+    def _load_deferred(self) -> None:
+        """Háttérszálon: modulok előtöltése + előzmények beolvasása; kirajzolás a Tk szálon."""
+        tail = None
+        with startup.span("deferred_runner"):
+            try:
+                import runner.scheduler, runner.run  # noqa: F401  (első futás ne várjon importra)
+            except Exception: pass
+        with startup.span("deferred_history"):
+            try:
+                from runner.history import HistoryStore
+                tail = HistoryStore(BASE_DIR / "out").tail(10)
+            except Exception: pass
+        with startup.span("deferred_cookbook"):
+            try:
+                import gui.cookbook  # noqa: F401
+            except Exception: pass
+        self.after(0, lambda: self._on_deferred_loaded(tail))
+
+    def _on_deferred_loaded(self, tail) -> None:
+        # Kérésre (SZI_HOOD_SPILL=1) a gyűrűből kieső sorok out/hood.log-ba (rotáló); a Tk
+        # szálon nyílik, így a mainloop utáni disable_spill biztosan utána fut
+        try:
+            if hood.spill_requested(): hood.enable_spill(BASE_DIR / "out")
+        except Exception: pass
+        self._render_history(tail or [])
+        startup.mark("deferred_loaded")
+        self.event_generate("<<StartupComplete>>", when="tail")
+
+    def _get_scheduler(self) -> "Scheduler":
+        if self._scheduler is None:
+            from runner.scheduler import Scheduler
+            self._scheduler = Scheduler()
+        return self._scheduler
 
     # ---------- Helpers ----------
     def _copy(self, text: str) -> None:
@@ -135,18 +217,32 @@ class App(ttk.Frame):
 
     def _update_run_enabled(self) -> None:
         has_text = self._has_paste_text()
-        self.btn_run.config(state=("normal" if has_text and not self._running else "disabled"))
+        self.btn_run.config(state=("normal" if has_text else "disabled"))
         self.btn_stop.config(state=("normal" if self._running else "disabled"))
+        active = self._scheduler.active_count() if self._scheduler is not None else 0
+        self.btn_stop_all.config(state=("normal" if active else "disabled"))
         if not self._running:
             if not has_text: self._set_next_hint("Illessz be tervrajzot!")
             else: self._set_next_hint("Nyomd meg a Futtatás gombot!")
 
     def _has_paste_text(self) -> bool:
-        return bool(self.paste_input.get("1.0","end-1c").strip())
+        # Nem másoljuk ki a tartalmat: az első nem-whitespace karakter keresése a Tk-ban
+        w = self.paste_input
+        if w.compare("end-1c", "==", "1.0"): return False
+        return bool(w.search(r"\S", "1.0", stopindex="end", regexp=True))
 
     def _on_text_modified(self, _evt=None):
         try: self.paste_input.edit_modified(0)
         except Exception: pass
+        self._paste_rev += 1
+        # Debounce: gépelés közben nem frissítünk minden billentyűre
+        if self._paste_after is not None:
+            try: self.after_cancel(self._paste_after)
+            except Exception: pass
+        self._paste_after = self.after(PASTE_DEBOUNCE_MS, self._on_paste_settled)
+
+    def _on_paste_settled(self) -> None:
+        self._paste_after = None
         self._update_run_enabled()
 
     def toggle_hood(self) -> None:
@@ -159,32 +255,42 @@ class App(ttk.Frame):
         try: vis = hood.is_visible()
         except Exception: vis = False
         if vis:
-            if not initial:
-                try:
-                    self.hood_text.delete("1.0","end")
-                    self.hood_text.insert("1.0", getattr(hood, "get_text", lambda: "")() or "Itt jelennek meg a parancsok és a részletes logok.")
-                except Exception: pass
+            if not initial: self._sync_hood()
             self.hood_frame.pack(fill="both", expand=True, pady=(6,0))
             self.hood_btn.config(text="Motorháztető elrejtése")
         else:
             if self.hood_frame.winfo_ismapped(): self.hood_frame.pack_forget()
             self.hood_btn.config(text="Motorháztető")
 
+    def _sync_hood(self) -> None:
+        """Csak az új hood-sorok hozzáfűzése (nincs teljes újraépítés)."""
+        try:
+            if not hood.is_visible(): return
+            lines, self._hood_cursor = hood.lines_since(self._hood_cursor)
+        except Exception: return
+        if lines: self._hood_extend(lines)
+
+    def _hood_extend(self, lines: List[str]) -> None:
+        if self._hood_placeholder:
+            self.hood_view.clear()
+            self._hood_placeholder = False
+        self.hood_view.extend(lines)
+
     def _refresh_history_ui(self) -> None:
+        try:
+            from runner.history import HistoryStore
+            tail = HistoryStore(BASE_DIR / "out").tail(10)
+        except Exception:
+            tail = []
+        self._render_history(tail)
+
+    def _render_history(self, tail) -> None:
         for w in list(self.history_list.children.values()): w.destroy()
         try:
-            base = Path(__file__).resolve().parents[1]
-            hist = base / "out" / "history.jsonl"
-            lines = []
-            if hist.exists():
-                with hist.open("r", encoding="utf-8") as f:
-                    lines = [ln.strip() for ln in f if ln.strip()]
-            tail = lines[-10:]
-            self._history_lines = tail
-            for ln in reversed(tail):
+            self._history_lines = [ln for ln, _ in tail]
+            for ln, obj in reversed(tail):
                 try:
-                    obj = json.loads(ln)
-                    ts = obj.get("ts_utc",""); sha = obj.get("sha256","")[:7]
+                    ts = obj.get("ts_utc",""); sha = (obj.get("sha256") or "")[:7]
                     ent = obj.get("entries",""); sz = obj.get("size","")
                     row = ttk.Frame(self.history_list); row.pack(fill="x")
                     ttk.Label(row, text=f"{ts}  {sha}  {ent}  {sz}").pack(side="left")
@@ -192,121 +298,161 @@ class App(ttk.Frame):
                 except Exception: pass
         except Exception: pass
 
-    def _append_history(self, sha: str, entries: int, size: int) -> None:
-        """Sikeres futás esetén sor hozzáfűzése az out/history.jsonl fájlhoz (duplázás elkerülése)."""
-        try:
-            base = Path(__file__).resolve().parents[1]
-            out_dir = base / "out"
-            out_dir.mkdir(parents=True, exist_ok=True)
-            hist = out_dir / "history.jsonl"
-            # Kerüld a duplikációt: ha már szerepel ugyanaz a sha, ne írj új sort
-            if hist.exists():
-                try:
-                    with hist.open("r", encoding="utf-8") as f:
-                        for ln in f:
-                            if f'"sha256":"{sha}"' in ln:
-                                return
-                except Exception:
-                    pass
-            obj = {
-                "ts_utc": datetime.now(timezone.utc).isoformat(),
-                "sha256": sha,
-                "entries": int(entries),
-                "size": int(size),
-            }
-            with hist.open("a", encoding="utf-8") as f:
-                f.write(json.dumps(obj, ensure_ascii=False) + "\n")
-        except Exception:
-            pass
-
     # ---------- Actions ----------
     def on_sanitize(self) -> None:
+        """Tisztítás háttérszálon; az eredmény egy lépésben kerül vissza, és csak akkor,
+        ha a terv közben nem változott."""
+        if self._sanitizing: return
         try:
             from gui.sanitize import sanitize
         except Exception:
-            sanitize = lambda t: (t, [])
+            sanitize = lambda t, progress=None: (t, [])
         original = self.paste_input.get("1.0","end-1c")
-        cleaned, notes = sanitize(original)
-        if cleaned != original:
-            self.paste_input.delete("1.0","end"); self.paste_input.insert("1.0", cleaned)
-            self._flash_status("Tisztítás kész — Nyomd meg a Futtatás gombot!", 2000)
-        else:
-            self._flash_status("Minden tiszta! — Nyomd meg a Futtatás gombot!", 2000)
-        self._update_run_enabled()
+        rev = self._paste_rev
+        self._sanitizing = True
+        self.btn_sanitize.config(state="disabled")
+        self.next_hint.config(text="Tisztítás…")
+        last_pct = [-1]
+
+        def progress(done: int, total: int):
+            pct = done * 100 // total if total else 100
+            if pct != last_pct[0]:
+                last_pct[0] = pct
+                self.after(0, lambda: self._sanitizing and self.next_hint.config(text=f"Tisztítás… {pct}%"))
+
+        def worker():
+            try: cleaned = sanitize(original, progress=progress)[0]
+            except Exception: cleaned = None
+            self.after(0, lambda: finish(cleaned))
+
+        def finish(cleaned: Optional[str]):
+            self._sanitizing = False
+            self.btn_sanitize.config(state="normal")
+            if cleaned is None:
+                self._flash_status("Hiba a tisztítás közben.", 2000)
+            elif self._paste_rev != rev:
+                self._flash_status("A terv közben változott — nyomd meg újra a Tisztítás gombot!", 2500)
+            elif cleaned != original:
+                w = self.paste_input
+                top, ins = w.yview()[0], w.index("insert")
+                w.delete("1.0","end"); w.insert("1.0", cleaned)
+                w.mark_set("insert", ins); w.yview_moveto(top)
+                self._flash_status("Tisztítás kész — Nyomd meg a Futtatás gombot!", 2000)
+            else:
+                self._flash_status("Minden tiszta! — Nyomd meg a Futtatás gombot!", 2000)
+            self._update_run_enabled()
+
+        threading.Thread(target=worker, daemon=True).start()
 
     def on_run(self) -> None:
-        if not self._has_paste_text() or self._running:
-            if not self._running: self._set_next_hint("Illessz be tervrajzot!")
+        if not self._has_paste_text():
+            self._set_next_hint("Illessz be tervrajzot!")
             return
+        if self._running and self._job_id:
+            try: hood.log(f"Háttérben fut tovább: {self._job_id}")
+            except Exception: pass
         # Tisztítás a panelekben
-        self.run_log.delete("1.0","end"); self.summary.delete("1.0","end")
-        try: self.hood_text.delete("1.0","end")
-        except Exception: pass
+        self.run_view.clear(); self.summary.delete("1.0","end")
+        self.hood_view.clear(); self._hood_placeholder = False
         # Evidence mezők törlése
         self.e_zip.set(""); self.e_sha.set(""); self.e_entries.set(""); self.e_size.set("")
         self.prog['value'] = 0
         self._set_next_hint("Fut… (Stop elérhető)")
         self._running = True; self._update_run_enabled()
 
-        # MVP "vizuális" lépések
-        steps = ["Előkészítés…","Sanitizer OK","Lint/Compile (szimuláció)…","Csomagolás (szimuláció)…","Ellenőrzés (MVP)…"]
-        self._scheduled.clear(); total = len(steps)
-        def stepper(i=0):
-            if not self._running: return
-            if i < total:
-                line = steps[i]
-                self.run_log.insert("end", f"{line}\n"); self.run_log.see("end")
-                try: hood.log(f"STEP {i+1}/{total}: {line}")
+        # Futás az ütemezőn; a haladást a runner eseményei adják (queue → Tk poll)
+        plan_text = self.paste_input.get("1.0","end-1c")
+        events: "queue.Queue[ProgressEvent]" = queue.Queue()
+        for h in self._scheduled:
+            try: self.after_cancel(h)
+            except Exception: pass
+        self._scheduled.clear()
+
+        def poll():
+            if self._job_id != job_id: return
+            self._drain_progress(events)
+            if self._running:
+                self._scheduled[:] = [self.after(PROGRESS_POLL_MS, poll)]
+
+        def finalize(info: "JobInfo"):
+            if self._job_id != job_id:
+                # Korábban indított, háttérben futó futás zárult le
+                try: hood.log(f"Háttérfutás vége: {info.job_id} ({info.status})")
                 except Exception: pass
-                self.prog['value'] = int((i+1)*100/total)
-                self._scheduled.append(self.after(150, lambda: stepper(i+1)))
+                self._sync_hood(); self._refresh_history_ui(); self._update_run_enabled()
+                return
+            self._drain_progress(events)
+            from runner.run import RunResult
+            from runner.scheduler import CANCELLED
+            res = info.result or RunResult(False, "Megszakítva", None, None, None, None,
+                                           ["Megszakítva (el sem indult)."], "Megszakítva.", run_id=info.job_id)
+            # Kötegelt kiírás: képkockánként egy insert, sorlimittel
+            self.run_view.extend(res.logs)
+            # Evidence megjelenítése (Motorháztető + panel)
+            self._sync_hood()
+            evidence = ["", "== Evidence =="]
+            if res.zip_path:
+                evidence.append(f"ZIP: {res.zip_path}")
+                self.e_zip.set(res.zip_path)
+            if res.sha256:
+                evidence.append(f"SHA256: {res.sha256}")
+                self.e_sha.set(res.sha256)
+            if res.entries is not None:
+                evidence.append(f"ENTRIES: {res.entries}")
+                self.e_entries.set(str(res.entries))
+            if res.size is not None:
+                evidence.append(f"SIZE: {res.size}")
+                self.e_size.set(str(res.size))
+            self._hood_extend(evidence)
+
+            self.summary.insert("1.0", (res.summary or "") + "\n")
+            # Stop állapot lezárása
+            self._running = False; self._update_run_enabled()
+            if res.ok:
+                # Az előzmény sort a runner írja (egyetlen író: runner.history)
+                self.prog['value'] = 100
+                self._set_next_hint("Kész.")
             else:
-                plan_text = self.paste_input.get("1.0","end-1c")
-                def worker():
-                    base = Path(__file__).resolve().parents[1]
-                    # Valódi futtatás a runner-rel; abort_flag megszakításra
-                    res = run_once(plan_text, abort_flag=lambda: not self._running, base=base)
-                    def finalize():
-                        for l in res.logs:
-                            self.run_log.insert("end", l + "\n")
-                        self.run_log.see("end")
-                        # Evidence megjelenítése (Motorháztető + panel)
-                        try: self.hood_text.insert("end", "\n== Evidence ==\n")
-                        except Exception: pass
-                        if res.zip_path:
-                            try: self.hood_text.insert("end", f"ZIP: {res.zip_path}\n")
-                            except Exception: pass
-                            self.e_zip.set(res.zip_path)
-                        if res.sha256:
-                            try: self.hood_text.insert("end", f"SHA256: {res.sha256}\n")
-                            except Exception: pass
-                            self.e_sha.set(res.sha256)
-                        if res.entries is not None:
-                            try: self.hood_text.insert("end", f"ENTRIES: {res.entries}\n")
-                            except Exception: pass
-                            self.e_entries.set(str(res.entries))
-                        if res.size is not None:
-                            try: self.hood_text.insert("end", f"SIZE: {res.size}\n")
-                            except Exception: pass
-                            self.e_size.set(str(res.size))
-
-                        self.summary.insert("1.0", (res.summary or "") + "\n")
-                        # Stop állapot lezárása
-                        self._running = False; self._update_run_enabled()
-                        if res.ok:
-                            self._set_next_hint("Kész.")
-                            # History append csak siker esetén (duplázás elkerülésével)
-                            if res.sha256 and (res.entries is not None) and (res.size is not None):
-                                self._append_history(res.sha256, int(res.entries), int(res.size))
-                        else:
-                            if (res.error or "").lower().startswith("megszakítva"):
-                                self._set_next_hint("Megszakítva.")
-                            else:
-                                self._set_next_hint(f"Hiba: {res.error}")
-                        self._refresh_history_ui()
-                    self.after(0, finalize)
-                threading.Thread(target=worker, daemon=True).start()
-        stepper(0)
+                if info.status == CANCELLED:
+                    self._set_next_hint("Megszakítva.")
+                else:
+                    self._set_next_hint(f"Hiba: {res.error}")
+            self._refresh_history_ui()
+
+        # on_done a worker szálán fut → after(0) a Tk szálra
+        scheduler = self._get_scheduler()
+        job_id = scheduler.submit(plan_text, BASE_DIR, progress=events.put,
+                                       on_done=lambda info: self.after(0, lambda: finalize(info)))
+        self._job_id = job_id
+        self._update_run_enabled()
+        try: hood.log(f"RUN: {job_id}")
+        except Exception: pass
+        if scheduler.active_count() > scheduler.max_workers:
+            self._set_next_hint("Sorban áll… (Stop elérhető)")
+        poll()
+
+    def _drain_progress(self, events: "queue.Queue[ProgressEvent]") -> None:
+        """A runner haladás-eseményeinek feldolgozása a Tk szálon (nem blokkol)."""
+        while True:
+            try: ev = events.get_nowait()
+            except queue.Empty: break
+            if ev.kind == "phase":
+                label = PHASE_LABELS.get(ev.phase, ev.phase)
+                self.prog['value'] = PHASE_PROGRESS.get(ev.phase, self.prog['value'])
+                if self._running: self.next_hint.config(text=f"Fut… {label} (Stop elérhető)")
+                try: hood.log(f"PHASE: {ev.phase}")
+                except Exception: pass
+            elif ev.kind == "file":
+                if ev.bytes_total: frac = ev.bytes_done / ev.bytes_total
+                elif ev.files_total: frac = ev.files_done / ev.files_total
+                else: frac = 0.0
+                lo, hi = PHASE_PROGRESS["package"], PHASE_PROGRESS["evidence"]
+                self.prog['value'] = lo + (hi - lo) * min(frac, 1.0)
+                total = f"/{ev.files_total}" if ev.files_total is not None else ""
+                if self._running: self.next_hint.config(text=f"Fut… Csomagolás {ev.files_done}{total}: {ev.current}")
+            elif ev.kind == "done":
+                self.prog['value'] = 100
+        self._sync_hood()
 
     def on_stop(self) -> None:
         if not self._running: return
@@ -314,12 +460,24 @@ class App(ttk.Frame):
             try: self.after_cancel(h)
             except Exception: pass
         self._scheduled.clear()
+        if self._job_id and self._scheduler is not None: self._scheduler.cancel(self._job_id)
         self._running = False; self.prog['value'] = 0
         try: hood.log("STOP: felhasználói megszakítás")
         except Exception: pass
+        self._sync_hood()
         self._set_next_hint("Megszakítva.")
         self._update_run_enabled()
 
+    def on_stop_all(self) -> None:
+        """Minden aktív (futó és sorban álló) futás leállítása, a háttérben futókat is."""
+        if self._scheduler is None: return
+        self.on_stop()
+        n = self._scheduler.cancel_all()
+        try: hood.log(f"STOP: összes futás megszakítva ({n} db)")
+        except Exception: pass
+        self._sync_hood()
+        self._update_run_enabled()
+
     def open_cookbook(self) -> None:
         # Cookbook modal (valódi), csendes hibaág
         try:
@@ -338,20 +496,48 @@ class App(ttk.Frame):
         except Exception:
             pass
 
-def main() -> None:
+def main(argv: Optional[List[str]] = None) -> int:
+    """--profile-startup: indulási időmérés out/startup_profile.jsonl-be (ld. gui.startup);
+    --exit: a késleltetett betöltés után kilép (CI / trendkövetés), exit 1 kerettúllépésnél."""
+    import sys
+    argv = sys.argv[1:] if argv is None else argv
+    profile = startup.enabled(argv)
+    auto_exit = profile and "--exit" in argv
+    startup.mark("main")
     # Témakezelés: ttkbootstrap (darkly) → ttk (clam) fallback, baseline szerint
-    if tb is not None:
+    with startup.span("theme"):
         try:
-            root = tb.Window(themename="darkly")
-            _ = tb.Style()
+            import ttkbootstrap as tb  # type: ignore
         except Exception:
+            tb = None  # type: ignore
+        if tb is not None:
+            try:
+                root = tb.Window(themename="darkly")
+                _ = tb.Style()
+            except Exception:
+                root = tk.Tk(); style = ttk.Style(root)
+        else:
             root = tk.Tk(); style = ttk.Style(root)
-    else:
-        root = tk.Tk(); style = ttk.Style(root)
-        try: style.theme_use("clam")
-        except Exception: pass
-    app = App(root); app.pack(fill="both", expand=True)
-    root.minsize(900, 640); root.mainloop()
+            try: style.theme_use("clam")
+            except Exception: pass
+    with startup.span("app_init"):
+        app = App(root); app.pack(fill="both", expand=True)
+    root.minsize(900, 640)
+    if profile:
+        def _done(_evt=None):
+            path = startup.write_report(BASE_DIR / "out")
+            try: hood.log(f"STARTUP: {startup.report()['first_frame_ms']} ms az első képkockáig → {path.name}")
+            except Exception: pass
+            if auto_exit: root.after(0, root.destroy)
+        app.bind("<<StartupComplete>>", _done, add="+")
+    root.mainloop()
+    # Kilépéskor a futó/sorban álló futások kooperatív leállítása (félkész mappák takarítása)
+    if app._scheduler is not None:
+        app._scheduler.shutdown(cancel=True, wait=True)
+    # A leállítás naplósorai még a hood.log-ba kerülnek, utána zárás (flush)
+    try: hood.disable_spill()
+    except Exception: pass
+    return 1 if auto_exit and startup.report()["over_budget"] else 0
 
 if __name__ == "__main__":
-    main()
+    raise SystemExit(main())
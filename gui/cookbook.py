@@ -1,16 +1,30 @@
-"""Cookbook modal – három fül (PRPs / EXAMPLES / GUIDES), non-recursive böngészés.
+"""Cookbook modal – három fül (PRPs / EXAMPLES / GUIDES), rekurzív böngészés.
 Hotfix v1.6.1: valós modális párbeszéd, Frissítés / Betöltés / Hozzáadás.
-- Csak .md / .txt fájlok, <= 128 KiB.
+- Csak .md / .txt fájlok, <= 128 KiB; almappákkal együtt (pl. PRPs/templates), rejtett
+  (.-tal kezdődő) fájlok/mappák nélkül.
+- Bejárás: os.scandir háttérszálon, a párbeszéd azonnal megnyílik és fülenként töltődik.
+  Mappánkénti mtime-pillanatkép: újrabejárás csak ott, ahol a mappa mtime-ja változott
+  (új / törölt / átnevezett bejegyzés); a változatlan mappák névlistája gyorsítótárból jön,
+  a méretszűrés minden bejáráskor friss.
 - Új minta hozzáadása: basename-only, tilos: '..', '/', '\\', abszolút út.
 - UI-only: nincs hálózat, nincs külső folyamat.
+- Keresés: teljes szöveges index (gui.cookbook_index), Keresés fül + előnézet;
+  az előnézetek LRU-gyorsítótárból jönnek (kulcs: útvonal, mtime, méret).
+  Az indexet a bejáró háttérszál építi; amíg nincs kész, a Keresés fül "Indexelés…"
+  jelzést mutat, és a bejárás végén fut le a keresés (a Tk szál sosem indexel).
 """
 from __future__ import annotations
 
+from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
-from typing import Callable, List, Tuple
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import os, queue, threading, time
 import tkinter as tk
 from tkinter import ttk
 
+from gui.cookbook_index import CookbookIndex
+
 BASE_DIR = Path(__file__).resolve().parents[1]
 PRPS_DIR = BASE_DIR / "PRPs"
 EXAMPLES_DIR = BASE_DIR / "EXAMPLES"
@@ -18,17 +32,98 @@ GUIDES_DIR = BASE_DIR / "GUIDES"
 
 ALLOWED_EXT = {".md", ".txt"}
 MAX_BYTES = 128 * 1024
+PREVIEW_CACHE_SIZE = 64
+SEARCH_DELAY_MS = 150
+SCAN_POLL_MS = 30
+
+
+@dataclass
+class _DirEntry:
+    mtime_ns: int
+    files: List[Path]    # a mappa saját .md/.txt fájljai (név szerint rendezve; méretszűrés nélkül)
+    subdirs: List[Path]
+    visible: Optional[List[Path]] = None  # legutóbbi méretszűrt lista (változásjelzéshez)
+
+
+class _TreeScanner:
+    """Rekurzív os.scandir bejárás mappánkénti mtime-pillanatképpel (szálbiztos)."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._dirs: Dict[Path, _DirEntry] = {}
+
+    @staticmethod
+    def _read_dir(d: Path, mtime_ns: int) -> _DirEntry:
+        files: List[Path] = []
+        subdirs: List[Path] = []
+        with os.scandir(d) as it:
+            for e in it:
+                if e.name.startswith("."):
+                    continue
+                try:
+                    if e.is_dir(follow_symlinks=False):
+                        subdirs.append(Path(e.path))
+                    elif e.is_file() and os.path.splitext(e.name)[1].lower() in ALLOWED_EXT:
+                        files.append(Path(e.path))
+                except OSError:
+                    continue
+        files.sort(key=lambda f: f.name)
+        subdirs.sort(key=lambda f: f.name)
+        return _DirEntry(mtime_ns, files, subdirs)
+
+    def scan(self, root: Path) -> Tuple[List[Path], bool]:
+        """A root alatti összes fájl (mappánként előre-rendezett bejárás) + volt-e változás.
+        A gyorsítótár csak neveket tart; a ≤ MAX_BYTES szűrés minden bejáráskor friss stat-ból."""
+        out: List[Path] = []
+        changed = False
+        seen = set()
+        stack = [root]
+        while stack:
+            d = stack.pop()
+            try:
+                mtime_ns = d.stat().st_mtime_ns
+            except OSError:
+                continue
+            seen.add(d)
+            with self._lock:
+                entry = self._dirs.get(d)
+            if entry is None or entry.mtime_ns != mtime_ns:
+                try:
+                    entry = self._read_dir(d, mtime_ns)
+                except OSError:
+                    continue
+                changed = True
+                with self._lock:
+                    self._dirs[d] = entry
+            # A méret helyben átírt fájlnál változik a mappa mtime-ja nélkül: mindig frissen szűrünk
+            visible: List[Path] = []
+            for f in entry.files:
+                try:
+                    if f.stat().st_size <= MAX_BYTES:
+                        visible.append(f)
+                except OSError:
+                    continue
+            if visible != entry.visible:
+                entry.visible = visible
+                changed = True
+            out.extend(visible)
+            stack.extend(reversed(entry.subdirs))
+        # Eltűnt mappák kivezetése a pillanatképből
+        with self._lock:
+            gone = [d for d in self._dirs if d not in seen and (d == root or root in d.parents)]
+            for d in gone:
+                del self._dirs[d]
+        return out, changed or bool(gone)
+
+
+_scanner = _TreeScanner()
 
 
 def _list_dir(root: Path) -> List[Path]:
+    """A root mappa és almappái .md/.txt fájljai (≤ MAX_BYTES), változás-vezérelt bejárással."""
     if not root.exists():
         return []
-    out: List[Path] = []
-    for f in sorted(root.iterdir()):
-        if f.is_file() and not f.name.startswith("."):
-            if f.suffix.lower() in ALLOWED_EXT and f.stat().st_size <= MAX_BYTES:
-                out.append(f)
-    return out
+    return _scanner.scan(root)[0]
 
 
 def list_cookbook_entries(limit: int = 200) -> List[Tuple[str, Path]]:
@@ -42,14 +137,52 @@ def list_cookbook_entries(limit: int = 200) -> List[Tuple[str, Path]]:
     return items
 
 
+@lru_cache(maxsize=PREVIEW_CACHE_SIZE)
+def _read_cached(path: str, mtime_ns: int, size: int, max_chars: int) -> str:
+    # mtime_ns/size csak a kulcs része: módosított fájl új bejegyzést kap
+    return Path(path).read_text(encoding="utf-8", errors="ignore")[:max_chars]
+
+
 def read_snippet(path: Path, max_chars: int = 4000) -> str:
     try:
-        txt = path.read_text(encoding="utf-8", errors="ignore")
-        return txt[:max_chars]
+        st = path.stat()
+        return _read_cached(str(path), st.st_mtime_ns, st.st_size, max_chars)
     except Exception:
         return ""
 
 
+_index: Optional[CookbookIndex] = None
+
+
+def index_ready() -> bool:
+    """Felépült-e már a keresőindex (a GUI addig nem keres, hogy ne blokkoljon)."""
+    return _index is not None
+
+
+def update_index(files: Iterable[Path]) -> CookbookIndex:
+    """Index igazítása egy már bejárt fájllistához (háttérszálból is hívható).
+    Az első index csak a teljes felépülés után lesz látható."""
+    global _index
+    idx = _index if _index is not None else CookbookIndex(BASE_DIR)
+    idx.update(files)
+    _index = idx
+    return idx
+
+
+def get_index(refresh: bool = True) -> CookbookIndex:
+    """A (folyamatonként egy) keresőindex; refresh=True: igazítás a három mappa tartalmához
+    (csak a változott fájlok olvasódnak újra). Hiányzó indexet szinkron épít fel."""
+    if _index is None or refresh:
+        return update_index(f for root in (PRPS_DIR, EXAMPLES_DIR, GUIDES_DIR) for f in _list_dir(root))
+    return _index
+
+
+def search(query: str, limit: int = 50) -> List[Tuple[str, float]]:
+    """Rangsorolt találatok a szakácskönyvben: [(rel útvonal, pontszám)].
+    Nem frissít (gépelés közben nincs fájlrendszer-bejárás); ld. get_index()."""
+    return get_index(refresh=False).search(query, limit)
+
+
 ALLOWED_DIRS = {"PRPs": PRPS_DIR, "EXAMPLES": EXAMPLES_DIR, "GUIDES": GUIDES_DIR}
 
 
@@ -81,6 +214,13 @@ def open_dialog(root: tk.Tk, on_load: Callable[[str], None]) -> None:
     win.transient(root)
     win.grab_set()
 
+    # Keresősáv (teljes szöveges, ékezet-független)
+    srow = ttk.Frame(win); srow.pack(fill="x", padx=6, pady=(6,0))
+    ttk.Label(srow, text="Keresés:", width=12).pack(side="left")
+    query_var = tk.StringVar()
+    query_ent = ttk.Entry(srow, textvariable=query_var)
+    query_ent.pack(side="left", fill="x", expand=True)
+
     nb = ttk.Notebook(win); nb.pack(fill="both", expand=True)
 
     tabs = {
@@ -91,17 +231,33 @@ def open_dialog(root: tk.Tk, on_load: Callable[[str], None]) -> None:
     listboxes: dict[str, tk.Listbox] = {}
 
     def refresh_all(select_rel: str | None = None):
-        for tab_name, dir_path in tabs.items():
-            frame = frames[tab_name]
+        # Bejárás háttérszálon; az eredmények fülenként érkeznek (queue → Tk poll)
+        if scan_state["busy"]:
+            scan_state["again"], scan_state["select"] = True, select_rel
+            return
+        scan_state["busy"], scan_state["again"] = True, False
+        results: "queue.Queue[Tuple[str, object]]" = queue.Queue()
+        for tab_name in tabs:
+            if listboxes[tab_name].size() == 0:
+                hints[tab_name].config(text="Betöltés…")
+
+        def worker():
+            files: List[Path] = []
+            for tab_name, dir_path in tabs.items():
+                lst, changed = (_scanner.scan(dir_path) if dir_path.exists() else ([], True))
+                files.extend(lst)
+                results.put((tab_name, (lst, changed)))
+            update_index(files)  # a már bejárt lista: nincs második bejárás
+            results.put(("", None))
+
+        def fill(tab_name: str, files: List[Path], changed: bool):
             lb: tk.Listbox = listboxes[tab_name]
-            lb.delete(0, "end")
-            files = _list_dir(dir_path)
-            for f in files:
-                lb.insert("end", str(f.relative_to(BASE_DIR)))
+            if changed or lb.size() != len(files):
+                lb.delete(0, "end")
+                lb.insert("end", *[str(f.relative_to(BASE_DIR)) for f in files])
             # üres fül hint
             hints[tab_name].config(
-                text="Csak a gyökérben lévő .md/.txt fájlokat listázzuk (≤128 KiB). Almappákat nem böngészünk."
-                     if not files else ""
+                text="Nincs .md/.txt fájl (≤128 KiB) ebben a mappában és almappáiban." if not files else ""
             )
             # kijelölés visszaállítása, ha kérve
             if select_rel is not None:
@@ -112,8 +268,32 @@ def open_dialog(root: tk.Tk, on_load: Callable[[str], None]) -> None:
                         lb.see(idx)
                         break
 
+        def poll():
+            try:
+                if not win.winfo_exists(): return
+            except Exception:
+                return
+            while True:
+                try: tab_name, payload = results.get_nowait()
+                except queue.Empty: break
+                if payload is not None:
+                    fill(tab_name, *payload)
+                    continue
+                # Index kész: bejárás vége
+                scan_state["busy"] = False
+                if query_var.get().strip():
+                    run_search()
+                if scan_state["again"]:
+                    refresh_all(scan_state["select"])
+                return
+            win.after(SCAN_POLL_MS, poll)
+
+        threading.Thread(target=worker, daemon=True).start()
+        win.after(SCAN_POLL_MS, poll)
+
     frames: dict[str, ttk.Frame] = {}
     hints: dict[str, ttk.Label] = {}
+    scan_state: dict = {"busy": False, "again": False, "select": None}
 
     for tab_name, dir_path in tabs.items():
         frm = ttk.Frame(nb, padding=6); nb.add(frm, text=tab_name)
@@ -125,6 +305,65 @@ def open_dialog(root: tk.Tk, on_load: Callable[[str], None]) -> None:
         hint.pack(fill="x", pady=(4,0))
         hints[tab_name] = hint
 
+    # Keresés fül: rangsorolt találatok (rel útvonalak)
+    SEARCH_TAB = "Keresés"
+    sfrm = ttk.Frame(nb, padding=6); nb.add(sfrm, text=SEARCH_TAB)
+    frames[SEARCH_TAB] = sfrm
+    listboxes[SEARCH_TAB] = tk.Listbox(sfrm, height=12, exportselection=False)
+    listboxes[SEARCH_TAB].pack(fill="both", expand=True)
+    hints[SEARCH_TAB] = ttk.Label(sfrm, text="Írj be keresőszót fent.", foreground="#777")
+    hints[SEARCH_TAB].pack(fill="x", pady=(4,0))
+
+    # Előnézet (LRU-gyorsítótárból)
+    preview = tk.Text(win, height=8, wrap="word", state="disabled")
+    preview.pack(fill="both", expand=False, padx=6, pady=(6,0))
+
+    def show_preview(_evt=None):
+        lb = listboxes[current_tab_name()]
+        sel = lb.curselection()
+        text = read_snippet(BASE_DIR / lb.get(sel[0])) if sel else ""
+        preview.config(state="normal")
+        preview.delete("1.0", "end"); preview.insert("1.0", text)
+        preview.config(state="disabled")
+
+    for lb in listboxes.values():
+        lb.bind("<<ListboxSelect>>", show_preview)
+
+    pending: list = []
+
+    def run_search():
+        pending.clear()
+        q = query_var.get().strip()
+        lb = listboxes[SEARCH_TAB]
+        lb.delete(0, "end")
+        if not q:
+            hints[SEARCH_TAB].config(text="Írj be keresőszót fent.")
+            return
+        if not index_ready():
+            # Az index még épül (háttérszál): a bejárás végén a poll újra hívja a keresést
+            hints[SEARCH_TAB].config(text="Indexelés…")
+            nb.select(frames[SEARCH_TAB])
+            if not scan_state["busy"]:
+                refresh_all()
+            return
+        t0 = time.perf_counter()
+        results = search(q)
+        ms = (time.perf_counter() - t0) * 1000
+        for rel, _score in results:
+            lb.insert("end", rel)
+        hints[SEARCH_TAB].config(text=f"{len(results)} találat ({ms:.1f} ms)" if results else "Nincs találat.")
+        nb.select(frames[SEARCH_TAB])
+
+    def on_query_change(*_a):
+        # Gépelés közbeni keresés, SEARCH_DELAY_MS-os debounce-szal
+        for h in pending:
+            try: win.after_cancel(h)
+            except Exception: pass
+        pending[:] = [win.after(SEARCH_DELAY_MS, run_search)]
+
+    query_var.trace_add("write", on_query_change)
+    query_ent.bind("<Return>", lambda _e: run_search())
+
     # Gombok
     btns = ttk.Frame(win); btns.pack(fill="x", pady=6)
     status = ttk.Label(win, text="", foreground="#444")
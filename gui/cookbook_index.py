@@ -0,0 +1,154 @@
+"""Szakácskönyv teljes szöveges index (invertált index a PRPs / EXAMPLES / GUIDES tartalmára).
+
+- Tokenizálás ékezet-függetlenül: kisbetű + NFD, a mellékjelek elhagyva (ő → o, á → a),
+  így "fuggveny" és "függvény" ugyanarra a tokenre esik
+- Inkrementális frissítés (útvonal, mtime_ns, méret) alapján: csak a változott fájl
+  olvasódik újra, a törölt fájlok kikerülnek
+- Keresés: minden kérdésszónak illeszkednie kell (az utolsó szó előtagként is, gépelés
+  közbeni kereséshez); rangsor BM25 szerint, fájlnév-találat bónusszal
+"""
+from __future__ import annotations
+from bisect import bisect_left
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+import math, re, threading, unicodedata
+
+_TOKEN_RE = re.compile(r"\w+")
+MIN_TOKEN = 2
+# BM25 paraméterek és a fájlnév-találat szorzója
+K1, B = 1.2, 0.75
+NAME_BOOST = 2.0
+
+def fold(text: str) -> str:
+    """Kisbetűs, ékezet nélküli alak (összehasonlításhoz)."""
+    text = text.lower()
+    if text.isascii():
+        return text
+    return "".join(ch for ch in unicodedata.normalize("NFD", text) if not unicodedata.combining(ch))
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in _TOKEN_RE.findall(fold(text)) if len(t) >= MIN_TOKEN]
+
+@dataclass
+class _Doc:
+    mtime_ns: int
+    size: int
+    length: int          # tokenek száma
+    terms: Tuple[str, ...]  # különböző tokenek (eltávolításhoz)
+    name_tokens: frozenset
+
+class CookbookIndex:
+    def __init__(self, base_dir: Path) -> None:
+        self.base_dir = Path(base_dir)
+        self._lock = threading.Lock()
+        self._docs: Dict[str, _Doc] = {}
+        self._postings: Dict[str, Dict[str, int]] = {}  # token → {rel: előfordulás}
+        self._vocab: Optional[List[str]] = None          # rendezett tokenlista (előtag-kereséshez)
+        self._total_len = 0
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def _remove(self, rel: str) -> None:
+        doc = self._docs.pop(rel, None)
+        if doc is None:
+            return
+        self._total_len -= doc.length
+        for tok in doc.terms:
+            plist = self._postings.get(tok)
+            if plist is not None and plist.pop(rel, None) is not None and not plist:
+                del self._postings[tok]
+                self._vocab = None
+
+    def _add(self, rel: str, mtime_ns: int, size: int, text: str) -> None:
+        tokens = tokenize(text)
+        tf: Dict[str, int] = {}
+        for t in tokens:
+            tf[t] = tf.get(t, 0) + 1
+        for t, n in tf.items():
+            plist = self._postings.get(t)
+            if plist is None:
+                self._postings[t] = plist = {}
+                self._vocab = None
+            plist[rel] = n
+        self._docs[rel] = _Doc(mtime_ns, size, len(tokens), tuple(tf), frozenset(tokenize(Path(rel).stem)))
+        self._total_len += len(tokens)
+
+    def update(self, files: Iterable[Path]) -> Tuple[int, int]:
+        """Index igazítása a megadott fájllistához. Vissza: (újraindexelt, eltávolított)."""
+        seen = set()
+        changed = 0
+        for path in files:
+            try:
+                rel = path.relative_to(self.base_dir).as_posix()
+                st = path.stat()
+            except (OSError, ValueError):
+                continue
+            seen.add(rel)
+            doc = self._docs.get(rel)
+            if doc is not None and doc.mtime_ns == st.st_mtime_ns and doc.size == st.st_size:
+                continue
+            try:
+                text = path.read_text(encoding="utf-8", errors="ignore")
+            except OSError:
+                continue
+            with self._lock:
+                self._remove(rel)
+                self._add(rel, st.st_mtime_ns, st.st_size, text)
+            changed += 1
+        with self._lock:
+            gone = [rel for rel in self._docs if rel not in seen]
+            for rel in gone:
+                self._remove(rel)
+        return changed, len(gone)
+
+    def _expand(self, term: str, prefix: bool) -> List[str]:
+        if not prefix:
+            return [term] if term in self._postings else []
+        if self._vocab is None:
+            self._vocab = sorted(self._postings)
+        out = []
+        i = bisect_left(self._vocab, term)
+        while i < len(self._vocab) and self._vocab[i].startswith(term):
+            out.append(self._vocab[i])
+            i += 1
+        return out
+
+    def search(self, query: str, limit: int = 50) -> List[Tuple[str, float]]:
+        """Rangsorolt találatok: [(rel, pontszám)], legjobb elöl."""
+        terms = tokenize(query)
+        if not terms:
+            return []
+        with self._lock:
+            n_docs = len(self._docs)
+            if not n_docs:
+                return []
+            avg_len = (self._total_len / n_docs) or 1.0
+            scores: Optional[Dict[str, float]] = None
+            for i, term in enumerate(terms):
+                # Az utolsó szó előtagként (gépelés közben), a többi pontos egyezéssel,
+                # de ha a pontos szó nem szerepel, előtagként is próbáljuk
+                expanded = self._expand(term, prefix=(i == len(terms) - 1)) or self._expand(term, True)
+                term_scores: Dict[str, float] = {}
+                for tok in expanded:
+                    plist = self._postings[tok]
+                    idf = math.log(1.0 + (n_docs - len(plist) + 0.5) / (len(plist) + 0.5))
+                    for rel, tf in plist.items():
+                        doc = self._docs[rel]
+                        s = idf * tf * (K1 + 1) / (tf + K1 * (1 - B + B * doc.length / avg_len))
+                        if tok in doc.name_tokens:
+                            s *= NAME_BOOST
+                        term_scores[rel] = max(term_scores.get(rel, 0.0), s)
+                # Fájlnév-egyezés tartalmi előfordulás nélkül is találat
+                for rel, doc in self._docs.items():
+                    if rel not in term_scores and any(t.startswith(term) for t in doc.name_tokens):
+                        term_scores[rel] = NAME_BOOST
+                if scores is None:
+                    scores = term_scores
+                else:
+                    scores = {rel: s + term_scores[rel] for rel, s in scores.items() if rel in term_scores}
+                if not scores:
+                    return []
+        ranked = sorted(scores.items(), key=lambda kv: (-kv[1], kv[0]))
+        return ranked[:limit]
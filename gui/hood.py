@@ -2,15 +2,77 @@
 
 Feladat:
 - láthatósági flag kezelése (alapból rejtett),
-- egyszerű naplóbuffer összegyűjtése,
+- korlátos naplóbuffer (gyűrű, CAPACITY bejegyzés) szintekkel; a szöveg csak olvasáskor
+  formázódik (log() csak időbélyeget + üzenetet tárol),
+- inkrementális olvasás: lines_since(cursor) → (új sorok, új cursor),
+- opcionális kiírás (enable_spill): a gyűrűből kieső sorok az out/hood.log-ba kerülnek,
+  méret szerinti rotációval (hood.log.1 … hood.log.N); a GUI csak SZI_HOOD_SPILL=1 mellett
+  kapcsolja be, kilépéskor disable_spill() zárja,
 - példaparancsok szöveges visszaadása (illusztráció, NEM végrehajtás).
 """
 from __future__ import annotations
+from collections import deque
 from datetime import datetime, timezone
-from typing import List
+from pathlib import Path
+from typing import Deque, List, Optional, Tuple
+import os, threading, time
+
+DEBUG, INFO, WARNING, ERROR = 10, 20, 30, 40
+LEVEL_NAMES = {DEBUG: "DEBUG", INFO: "INFO", WARNING: "WARNING", ERROR: "ERROR"}
+
+CAPACITY = 5000
+SPILL_ENV = "SZI_HOOD_SPILL"
+SPILL_NAME = "hood.log"
+SPILL_MAX_BYTES = 1024 * 1024
+SPILL_BACKUPS = 3
+
+# Bejegyzés: (sorszám, unix idő, szint, üzenet) – a sorszám a cursor alapja
+_Entry = Tuple[int, float, int, str]
 
 _visible: bool = False
-_log: List[str] = []
+_lock = threading.Lock()
+_log: Deque[_Entry] = deque(maxlen=CAPACITY)
+_seq: int = 0
+_min_level: int = DEBUG
+
+class _Spill:
+    """Rotáló szövegfájl a gyűrűből kieső soroknak."""
+    def __init__(self, path: Path, max_bytes: int, backups: int) -> None:
+        self.path = path
+        self.max_bytes = max(1, int(max_bytes))
+        self.backups = max(0, int(backups))
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._f = path.open("a", encoding="utf-8")
+        self._size = self._f.tell()
+
+    def write(self, line: str) -> None:
+        data = line + "\n"
+        n = len(data.encode("utf-8"))
+        if self._size and self._size + n > self.max_bytes:
+            self._rotate()
+        self._f.write(data)
+        self._size += n
+
+    def _rotate(self) -> None:
+        self._f.close()
+        if self.backups:
+            for i in range(self.backups - 1, 0, -1):
+                src = self.path.with_name(f"{self.path.name}.{i}")
+                if src.exists():
+                    os.replace(src, self.path.with_name(f"{self.path.name}.{i + 1}"))
+            os.replace(self.path, self.path.with_name(f"{self.path.name}.1"))
+            self._f = self.path.open("a", encoding="utf-8")
+        else:
+            self._f = self.path.open("w", encoding="utf-8")
+        self._size = 0
+
+    def flush(self) -> None:
+        self._f.flush()
+
+    def close(self) -> None:
+        self._f.close()
+
+_spill: Optional[_Spill] = None
 
 def set_visible(flag: bool) -> None:
     global _visible
@@ -22,14 +84,94 @@ def is_visible() -> bool:
 def utc_now() -> str:
     return datetime.now(timezone.utc).isoformat(timespec="milliseconds")
 
-def log(line: str) -> None:
-    _log.append(f"[{utc_now()}] {line}")
+def _format(entry: _Entry) -> str:
+    _seq_no, ts, level, msg = entry
+    stamp = datetime.fromtimestamp(ts, timezone.utc).isoformat(timespec="milliseconds")
+    if level == INFO:
+        return f"[{stamp}] {msg}"
+    return f"[{stamp}] {LEVEL_NAMES.get(level, str(level))}: {msg}"
+
+def set_level(level: int) -> None:
+    """Minimális naplózott szint (az alacsonyabbak el sem tárolódnak)."""
+    global _min_level
+    _min_level = int(level)
 
-def get_text() -> str:
-    return "\n".join(_log)
+def log(line: str, level: int = INFO) -> None:
+    global _seq
+    if level < _min_level:
+        return
+    now = time.time()
+    with _lock:
+        if _spill is not None and len(_log) == _log.maxlen:
+            try: _spill.write(_format(_log[0]))
+            except Exception: pass
+        _log.append((_seq, now, level, str(line)))
+        _seq += 1
+
+def debug(line: str) -> None: log(line, DEBUG)
+def warning(line: str) -> None: log(line, WARNING)
+def error(line: str) -> None: log(line, ERROR)
+
+def get_text(level: int = DEBUG) -> str:
+    with _lock:
+        entries = list(_log)
+    return "\n".join(_format(e) for e in entries if e[2] >= level)
+
+def lines_since(cursor: int, level: int = DEBUG) -> Tuple[List[str], int]:
+    """A cursor óta naplózott sorok + új cursor (inkrementális megjelenítéshez).
+    A cursor monoton sorszám; ha a kért sorok már kiestek a gyűrűből, a legrégebbi
+    még meglévőtől indul (a kiesettek a spill fájlban vannak, ha az be van kapcsolva)."""
+    with _lock:
+        if not _log or cursor >= _seq:
+            return [], _seq
+        start = max(0, cursor - _log[0][0])
+        entries = [_log[i] for i in range(start, len(_log))]
+        end = _seq
+    return [_format(e) for e in entries if e[2] >= level], end
+
+def cursor() -> int:
+    """Az aktuális (következő) sorszám – innen indulva csak az új sorok jönnek."""
+    return _seq
 
 def clear() -> None:
-    _log.clear()
+    with _lock:
+        _log.clear()
+
+def set_capacity(capacity: int) -> None:
+    """Gyűrű méretének módosítása (a legújabb bejegyzések megmaradnak)."""
+    global _log
+    capacity = max(1, int(capacity))
+    with _lock:
+        if _spill is not None:
+            for e in list(_log)[:max(0, len(_log) - capacity)]:
+                try: _spill.write(_format(e))
+                except Exception: pass
+        _log = deque(_log, maxlen=capacity)
+
+def spill_requested() -> bool:
+    """Kérte-e a felhasználó a hood.log kiírást (SZI_HOOD_SPILL=1)."""
+    return os.environ.get(SPILL_ENV, "") not in ("", "0")
+
+def enable_spill(out_dir: Path, max_bytes: int = SPILL_MAX_BYTES, backups: int = SPILL_BACKUPS) -> Path:
+    """A gyűrűből kieső sorok mentése out_dir/hood.log-ba (rotációval). Vissza: a fájl útja."""
+    global _spill
+    with _lock:
+        if _spill is not None:
+            _spill.close()
+        _spill = _Spill(Path(out_dir) / SPILL_NAME, max_bytes, backups)
+        return _spill.path
+
+def disable_spill() -> None:
+    global _spill
+    with _lock:
+        if _spill is not None:
+            _spill.close()
+            _spill = None
+
+def flush_spill() -> None:
+    with _lock:
+        if _spill is not None:
+            _spill.flush()
 
 def describe_commands(example_only: bool=True) -> list[str]:
     # Csak illusztráció; nincs végrehajtás.
@@ -0,0 +1,91 @@
+"""Nagy forgalmú napló-nézet tk.Text fölé (futási napló, Motorháztető).
+
+- append/extend nem ír azonnal a widgetbe: a sorok pufferbe kerülnek, és képkockánként
+  (FRAME_MS) egyetlen insert írja ki őket; egy képkocka legfeljebb MAX_LINES_PER_FRAME sort
+- sorlimit (max_lines): a legrégebbi sorok törlődnek (gyűrűpuffer-viselkedés); a pufferben
+  is csak az utolsó max_lines sor marad, a kiírás előtt eldobottak számát jelezzük
+- automatikus görgetés csak akkor, ha a nézet az alján állt
+"""
+from __future__ import annotations
+from collections import deque
+from typing import Deque, Iterable, Optional
+import tkinter as tk
+
+FRAME_MS = 16
+MAX_LINES_PER_FRAME = 5000
+
+class LogView:
+    def __init__(self, text: tk.Text, max_lines: int = 5000) -> None:
+        self.text = text
+        self.max_lines = max(1, int(max_lines))
+        self._pending: Deque[str] = deque(maxlen=self.max_lines)
+        self._dropped = 0
+        self._lines = 0  # a widgetben lévő sorok száma
+        self._after: Optional[str] = None
+
+    def append(self, line: str) -> None:
+        self.extend((line,))
+
+    def extend(self, lines: Iterable[str]) -> None:
+        for ln in lines:
+            for part in str(ln).split("\n"):
+                if len(self._pending) == self._pending.maxlen:
+                    self._dropped += 1
+                self._pending.append(part)
+        self._schedule()
+
+    def _schedule(self) -> None:
+        if self._after is None and self._pending:
+            try:
+                self._after = self.text.after(FRAME_MS, self.flush)
+            except Exception:
+                self._after = None
+
+    def flush(self) -> None:
+        """Egy képkockányi puffer kiírása egyetlen inserttel, majd a sorlimit érvényesítése."""
+        self._after = None
+        if not self._pending and not self._dropped:
+            return
+        batch = []
+        if self._dropped:
+            batch.append(f"… {self._dropped} régebbi sor kihagyva …")
+            self._dropped = 0
+        n = min(len(self._pending), MAX_LINES_PER_FRAME)
+        batch.extend(self._pending.popleft() for _ in range(n))
+        try:
+            at_bottom = self.text.yview()[1] >= 0.999
+            self.text.insert("end", "\n".join(batch) + "\n")
+            self._lines += len(batch)
+            excess = self._lines - self.max_lines
+            if excess > 0:
+                self.text.delete("1.0", f"{excess + 1}.0")
+                self._lines -= excess
+            if at_bottom:
+                self.text.see("end")
+        except Exception:
+            pass
+        self._schedule()
+
+    def flush_all(self) -> None:
+        while self._pending or self._dropped:
+            self.flush()
+        if self._after is not None:
+            try:
+                self.text.after_cancel(self._after)
+            except Exception:
+                pass
+            self._after = None
+
+    def clear(self) -> None:
+        self._pending.clear()
+        self._dropped = 0
+        self._lines = 0
+        try:
+            self.text.delete("1.0", "end")
+        except Exception:
+            pass
+
+    def get_text(self) -> str:
+        """A teljes látható tartalom (a függő sorokkal együtt), pl. másoláshoz."""
+        self.flush_all()
+        return self.text.get("1.0", "end-1c")
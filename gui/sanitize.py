@@ -1,6 +1,8 @@
 import unicodedata, re
+from typing import Callable, Optional
 
-MAX_INPUT_CHARS = 500_000
+# Darabméret (karakter): a köztes másolatok ekkorák, nem a teljes bemenet méretűek
+CHUNK_CHARS = 1 << 20
 CONTROL_RE = re.compile(r"[\x00-\x08\x0B\x0C\x0E-\x1F]")
 SMART_MAP = str.maketrans({
     "\u2018": "'", "\u2019": "'",
@@ -8,26 +10,78 @@ SMART_MAP = str.maketrans({
     "\u2013": "-", "\u2014": "-",
     "\u00A0": " ",
 })
+# Okos idézők cseréje célzott replace-ekkel: nem-ASCII szövegen a str.translate
+# karakterenkénti táblakeresése sokszorosan lassabb, mint a memchr-alapú keresés/csere
+_SMART = [(chr(k), v) for k, v in SMART_MAP.items()]
+# A CONTROL_RE által törölt bájtok (tiszta-ASCII ellenőrzéshez bytes.translate-tel)
+_CONTROL_BYTES = bytes([*range(0x00, 0x09), 0x0B, 0x0C, *range(0x0E, 0x20)])
 
-def sanitize(text: str) -> tuple[str, list[str]]:
-    """Sanitizer (NFC, CRLF→LF, vezérlők eltávolítása, BOM kiszedése, „okos idézők”)."""
+def _boundary(text: str, start: int, pos: int) -> int:
+    """Darabhatár pos közelében: közvetlenül egy LF után (CRLF és kombináló jelsorozat
+    nem szakad ketté), ennek hiányában nyomtatható ASCII karakter előtt (ez sosem törlődik
+    és semmi nem kapcsolódik hozzá visszafelé)."""
+    if pos >= len(text):
+        return len(text)
+    j = text.rfind("\n", start, pos)
+    if j >= start:
+        return j + 1
+    for i in range(pos, len(text)):
+        if " " <= text[i] < "\x80":
+            return i
+    return len(text)
+
+def _needs_work(chunk: str) -> bool:
+    """Van-e teendő; tiszta ASCII (TAB/LF/nyomtatható) darabnál nincs. A bytes.translate
+    törlés sokszor gyorsabb egy regex-keresésnél."""
+    if not chunk.isascii() or "\r" in chunk:
+        return True
+    raw = chunk.encode("ascii")
+    return len(raw.translate(None, _CONTROL_BYTES)) != len(raw)
+
+def _clean_chunk(chunk: str) -> str:
+    # Minden lépés csak akkor fut, ha a gyors keresés talál teendőt
+    if "\r" in chunk:
+        chunk = chunk.replace("\r\n", "\n").replace("\r", "\n")
+    if CONTROL_RE.search(chunk):
+        chunk = CONTROL_RE.sub("", chunk)
+    if not chunk.isascii():
+        for src, dst in _SMART:
+            if src in chunk:
+                chunk = chunk.replace(src, dst)
+        chunk = unicodedata.normalize("NFC", chunk)  # belső gyors-ellenőrzéssel
+    return chunk
+
+def sanitize(text: str, progress: Optional[Callable[[int, int], None]] = None) -> tuple[str, list[str]]:
+    """Sanitizer (NFC, CRLF→LF, vezérlők eltávolítása, BOM kiszedése, „okos idézők”).
+    Darabonként (CHUNK_CHARS), nincs méretkorlát/csonkítás; tiszta ASCII darabon semmi
+    nem fut és nem másolódik, ASCII darabon nincs NFC.
+    progress(kész karakter, összes): darabonként hívva (a hívó szálán)."""
     notes = []
-    changed = False
-
-    if len(text) > MAX_INPUT_CHARS:
-        notes.append(f"Input túl nagy ({len(text)}), trunc {MAX_INPUT_CHARS}-ig.")
-        text = text[:MAX_INPUT_CHARS]
-        changed = True
-
-    before = text
-    text = text.lstrip("\ufeff")
-    text = text.replace("\r\n", "\n").replace("\r", "\n")
-    text = CONTROL_RE.sub("", text)
-    text = text.translate(SMART_MAP)
-    text = unicodedata.normalize("NFC", text)
-    text = text.strip()
-
-    if text != before or changed:
+
+    start = 0
+    while text.startswith("\uFEFF", start):
+        start += 1
+    # Darabok: str = tisztított darab, (pos, end) = változatlan tiszta ASCII szakasz
+    # (ez utóbbit nem tartjuk meg külön másolatban)
+    parts: list = []
+    pos = start
+    while pos < len(text):
+        end = _boundary(text, pos, pos + CHUNK_CHARS)
+        chunk = text[pos:end]
+        if _needs_work(chunk):
+            parts.append(_clean_chunk(chunk))
+        else:
+            parts.append((pos, end))
+        pos = end
+        if progress is not None:
+            progress(pos, len(text))
+    if all(isinstance(p, tuple) for p in parts):
+        out = text[start:] if start else text
+    else:
+        out = "".join(p if isinstance(p, str) else text[p[0]:p[1]] for p in parts)
+    out = out.strip()
+
+    if out != text:
         notes.append("Normalizálás és tisztítás alkalmazva.")
 
-    return text, notes
+    return out, notes
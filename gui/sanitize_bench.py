@@ -0,0 +1,106 @@
+"""Mikro-benchmark: gui.sanitize.sanitize vs. a korábbi többmenetes változat.
+
+Használat:
+    python -m gui.sanitize_bench --sizes 1,10,50 --repeat 3 --out sanitize_bench.json
+
+- Bemenetek (MB-onként): "mixed" (magyar szöveg, CRLF, okos idézők, vezérlők) és "ascii" (tiszta)
+- A régi változat itt csonkítás NÉLKÜL fut (azonos munka), különben 500k felett nem összevethető
+- --memory: csúcs-memória (tracemalloc) külön futásban; a mérés maga lassít, ezért opcionális
+"""
+from __future__ import annotations
+import argparse, json, platform, random, re, sys, tracemalloc, unicodedata
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from gui.sanitize import sanitize, SMART_MAP, CONTROL_RE
+from runner.timing import timed as _timed
+
+BENCH_VERSION = 1
+
+def legacy_sanitize(text: str) -> tuple[str, list[str]]:
+    """A korábbi (hét menetes) algoritmus, MAX_INPUT_CHARS csonkítás nélkül."""
+    notes = []
+    before = text
+    text = text.lstrip("\ufeff")
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    text = CONTROL_RE.sub("", text)
+    text = text.translate(SMART_MAP)
+    text = unicodedata.normalize("NFC", text)
+    text = text.strip()
+    if text != before:
+        notes.append("Normalizálás és tisztítás alkalmazva.")
+    return text, notes
+
+_WORDS = ("árvíztűrő tükörfúrógép tervrajz csomag futás kapu napló bizonyíték "
+          "import def return class self path zip sha256 entries size").split()
+
+def make_input(kind: str, n_chars: int, seed: int = 1) -> str:
+    rnd = random.Random(seed)
+    words = [w for w in _WORDS if w.isascii()] if kind == "ascii" else _WORDS
+    extras = ["\r\n", "“idézet”", "—", "\u00a0", "\x0b"] if kind == "mixed" else []
+    line_end = "\r\n" if kind == "mixed" else "\n"
+    block: List[str] = []
+    size = 0
+    while size < 64 * 1024:
+        line = " ".join(rnd.choice(words) for _ in range(10))
+        if extras and rnd.random() < 0.3:
+            line += " " + rnd.choice(extras)
+        block.append(line + line_end)
+        size += len(block[-1])
+    unit = "".join(block)
+    text = unit * (n_chars // len(unit) + 1)
+    return ("\ufeff" if kind == "mixed" else "") + text[:n_chars]
+
+def _peak(fn: Callable[[], object]) -> int:
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def run_bench(sizes_mb: List[float], repeat: int = 3, memory: bool = False) -> Dict[str, object]:
+    results: Dict[str, object] = {}
+    for mb in sizes_mb:
+        for kind in ("mixed", "ascii"):
+            text = make_input(kind, int(mb * 1024 * 1024))
+            assert sanitize(text) == legacy_sanitize(text), "eltérő kimenet"
+            row: Dict[str, object] = {"chars": len(text)}
+            row["legacy"] = _timed(lambda: legacy_sanitize(text), repeat)
+            row["fused"] = _timed(lambda: sanitize(text), repeat)
+            row["speedup"] = round(row["legacy"]["s"] / (row["fused"]["s"] or 1e-9), 2)
+            if memory:
+                row["legacy"]["peak_bytes"] = _peak(lambda: legacy_sanitize(text))
+                row["fused"]["peak_bytes"] = _peak(lambda: sanitize(text))
+            results[f"{kind}_{mb:g}MB"] = row
+    return {
+        "version": BENCH_VERSION,
+        "meta": {
+            "ts_utc": datetime.now(timezone.utc).isoformat(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m gui.sanitize_bench", description="sanitize mikro-benchmark")
+    ap.add_argument("--sizes", default="1,10,50", help="bemenet mérete MB-ban, vesszővel")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--memory", action="store_true", help="csúcs-memória mérése (tracemalloc)")
+    ap.add_argument("--out", type=Path, default=None, help="JSON eredmény fájlba (különben stdout)")
+    args = ap.parse_args(argv)
+
+    sizes = [float(s) for s in re.split(r"\s*,\s*", args.sizes.strip()) if s]
+    report = run_bench(sizes, args.repeat, args.memory)
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.out:
+        args.out.write_text(text, encoding="utf-8")
+    else:
+        print(text)
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
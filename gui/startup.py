@@ -0,0 +1,87 @@
+"""Indulási időmérés (hidegindítás): importok, App.__init__, első képkocka, késleltetett betöltés.
+
+- Mérőpontok mindig gyűlnek (olcsó); kiírás csak profilozó módban:
+  python start_gui.py --profile-startup   (vagy SZI_PROFILE_STARTUP=1)
+- Kimenet: out/startup_profile.jsonl, futásonként egy sor (trendkövetéshez)
+- Kezdőpont: a start_gui.py első utasítása (set_origin); más belépési pontnál a
+  gui.startup importja. Az interpreter saját indulása (python.exe betöltés, site) nincs benne.
+- Keret: first_frame_ms <= BUDGET_MS (felülírható: SZI_STARTUP_BUDGET_MS); túllépésnél
+  over_budget=true, és a --profile-startup --exit futás kilépési kódja 1
+"""
+from __future__ import annotations
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+import json, os, sys, time
+
+_T0 = time.perf_counter()  # felülírja a set_origin (start_gui.py)
+
+PROFILE_ENV = "SZI_PROFILE_STARTUP"
+BUDGET_ENV = "SZI_STARTUP_BUDGET_MS"
+BUDGET_MS = 400.0
+PROFILE_NAME = "startup_profile.jsonl"
+
+_marks: Dict[str, float] = {}
+_spans: Dict[str, float] = {}
+_first_frame_modules: Optional[list] = None
+
+def set_origin(t0: float) -> None:
+    """Kezdőpont (time.perf_counter érték) a belépési pont legelejéről."""
+    global _T0
+    _T0 = t0
+
+def _ms(t: float) -> float:
+    return round((t - _T0) * 1000.0, 3)
+
+def enabled(argv=None) -> bool:
+    argv = sys.argv[1:] if argv is None else argv
+    return "--profile-startup" in argv or os.environ.get(PROFILE_ENV, "") not in ("", "0")
+
+def budget_ms() -> float:
+    try:
+        return float(os.environ.get(BUDGET_ENV, BUDGET_MS))
+    except ValueError:
+        return BUDGET_MS
+
+def mark(name: str) -> None:
+    """Mérőpont: eltelt idő (ms) a kezdőpont óta (ld. set_origin); csak az első rögzül."""
+    _marks.setdefault(name, _ms(time.perf_counter()))
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    t = time.perf_counter()
+    try:
+        yield
+    finally:
+        _spans[name] = round((time.perf_counter() - t) * 1000.0, 3)
+
+def first_frame() -> None:
+    """Az első képkocka kirajzolva; a betöltött modulok pillanatképe (lusta-e a runner)."""
+    global _first_frame_modules
+    if "first_frame" in _marks:
+        return
+    mark("first_frame")
+    _first_frame_modules = sorted(m for m in sys.modules if m.startswith(("runner", "gui.cookbook")))
+
+def report() -> dict:
+    ff = _marks.get("first_frame")
+    budget = budget_ms()
+    return {
+        "ts_utc": datetime.now(timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "marks_ms": dict(_marks),
+        "spans_ms": dict(_spans),
+        "first_frame_ms": ff,
+        "budget_ms": budget,
+        "over_budget": ff is None or ff > budget,
+        "eager_modules": _first_frame_modules,
+        "modules_loaded": len(sys.modules),
+    }
+
+def write_report(out_dir: Path) -> Path:
+    out_dir.mkdir(parents=True, exist_ok=True)
+    path = out_dir / PROFILE_NAME
+    with path.open("a", encoding="utf-8") as f:
+        f.write(json.dumps(report(), ensure_ascii=False) + "\n")
+    return path
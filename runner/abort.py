@@ -0,0 +1,17 @@
+"""Kooperatív megszakítás a hosszú ciklusokhoz (fájlonként / blokkonként ellenőrzött abort_flag)."""
+from __future__ import annotations
+from typing import Callable, Optional
+
+AbortFlag = Optional[Callable[[], bool]]
+
+class Aborted(Exception):
+    """Felhasználói megszakítás; phase: melyik fázisban, done: hány egység (fájl/blokk) készült el."""
+
+    def __init__(self, phase: str = "", done: int = 0) -> None:
+        super().__init__(f"Megszakítva ({phase}, kész: {done})" if phase else "Megszakítva")
+        self.phase = phase
+        self.done = done
+
+def check(abort_flag: AbortFlag, phase: str = "", done: int = 0) -> None:
+    if abort_flag is not None and abort_flag():
+        raise Aborted(phase, done)
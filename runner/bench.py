@@ -0,0 +1,197 @@
+"""Benchmark a run_once csomagolási láncára (szintetikus fák, fázisonkénti időmérés).
+
+Használat:
+    python -m runner.bench --shapes tiny,huge,deep --repeat 3 --out bench.json
+    python -m runner.bench --compare bench_baseline.json --threshold 0.15
+
+- Fázisok: preflight, scan, fingerprint, compress, compress_incremental, hash,
+  entry_hash, evidence, run_once, run_once_cached
+- Kimenet: gépi feldolgozásra szánt JSON (stdout vagy --out)
+- --compare: regresszió jelzése a tárolt alapvonalhoz képest (exit 1, ha van)
+"""
+from __future__ import annotations
+import argparse, json, os, platform, random, shutil, sys, tempfile, time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .preflight import check_environment
+from .packager import make_package, iter_package_files, tree_fingerprint, load_manifest, DEFAULT_PROFILE
+from .proof import sha256_of, entry_manifest, files_from_manifest, make_evidence, write_evidence_json
+from .run import run_once
+from .timing import timed as _timed
+
+BENCH_VERSION = 1
+INCLUDE_DIRS = ["gui", "PRPs", "EXAMPLES", "GUIDES"]
+EXCLUDE_GLOBS = ["**/__pycache__/**", "**/*.pyc", ".git/**", "out/**"]
+
+# Fa-alakzatok: files darab fájl, size bájt/fájl, depth mappa-mélység, fanout mappa/szint
+SHAPES: Dict[str, dict] = {
+    "tiny": {"files": 5000, "size": 200, "depth": 2, "fanout": 8},
+    "huge": {"files": 4, "size": 32 * 1024 * 1024, "depth": 1, "fanout": 1},
+    "deep": {"files": 500, "size": 4096, "depth": 40, "fanout": 1},
+}
+
+_WORDS = ("alma körte szilva barack tervrajz csomag futás kapu napló bizonyíték "
+          "import def return class self path zip sha256 entries size").split()
+
+def _text_block(rnd: random.Random, n: int) -> bytes:
+    out = bytearray()
+    while len(out) < n:
+        out += (" ".join(rnd.choice(_WORDS) for _ in range(12)) + "\n").encode("utf-8")
+    return bytes(out[:n])
+
+def make_tree(root: Path, shape: dict, seed: int = 1) -> Dict[str, int]:
+    """Szintetikus fa root alatt (gui/ + PRPs/ + GUIDES/), determinisztikus tartalommal.
+    A fájlok felét szöveg, felét véletlen bájt tölti; az mtime-ok a múltba kerülnek,
+    hogy a csomag-gyorsítótár is mérhető legyen. Vissza: {files, bytes}."""
+    rnd = random.Random(seed)
+    past = time.time() - 3600
+    readme = root / "gui" / "README.md"
+    readme.parent.mkdir(parents=True, exist_ok=True)
+    readme.write_bytes(b"bench\n")
+    os.utime(readme, (past, past))
+    level_dirs = [root / "PRPs"]
+    all_dirs = [root / "GUIDES"] + level_dirs
+    for level in range(max(shape["depth"] - 1, 0)):
+        level_dirs = [d / f"d{level}_{i}" for d in level_dirs for i in range(shape["fanout"])]
+        all_dirs.extend(level_dirs)
+    for d in all_dirs:
+        d.mkdir(parents=True, exist_ok=True)
+    block = 1024 * 1024
+    total = len(b"bench\n")
+    for i in range(shape["files"]):
+        p = all_dirs[i % len(all_dirs)] / f"f{i:06d}.{'md' if i % 2 == 0 else 'bin'}"
+        with p.open("wb") as f:
+            left = shape["size"]
+            while left > 0:
+                n = min(block, left)
+                # getrandbits(8n) == Random.randbytes(n) (3.9+) tartalma, 3.8-on is
+                f.write(_text_block(rnd, n) if i % 2 == 0 else rnd.getrandbits(8 * n).to_bytes(n, "little"))
+                left -= n
+        os.utime(p, (past, past))
+        total += shape["size"]
+    return {"files": shape["files"] + 1, "bytes": total}
+
+def bench_shape(name: str, shape: dict, repeat: int, jobs: int, profile: str,
+                workdir: Optional[Path] = None) -> Dict[str, object]:
+    """Egy alakzat felépítése és fázisonkénti mérése."""
+    tmp = Path(tempfile.mkdtemp(prefix=f"bench-{name}-", dir=workdir))
+    try:
+        base = tmp / "tree"
+        info = make_tree(base, shape)
+        dest = tmp / "pkg"
+        phases: Dict[str, object] = {}
+        state: Dict[str, object] = {}
+
+        def _pack():
+            state["pkg"] = make_package(base, INCLUDE_DIRS, EXCLUDE_GLOBS, dest, jobs=jobs, profile=profile)
+
+        def _evidence():
+            zip_path, entries, size, sha = state["pkg"]
+            files = files_from_manifest(load_manifest(dest))
+            write_evidence_json(make_evidence(zip_path, entries, size, sha256=sha, files=files), dest)
+
+        phases["preflight"] = _timed(lambda: check_environment(base), repeat)
+        phases["scan"] = _timed(lambda: sum(1 for _ in iter_package_files(base, INCLUDE_DIRS, EXCLUDE_GLOBS)), repeat)
+        phases["fingerprint"] = _timed(lambda: tree_fingerprint(base, INCLUDE_DIRS, EXCLUDE_GLOBS, profile), repeat)
+        phases["compress"] = _timed(lambda: (shutil.rmtree(dest, ignore_errors=True), _pack()), repeat)
+        phases["compress_incremental"] = _timed(
+            lambda: make_package(base, INCLUDE_DIRS, EXCLUDE_GLOBS, tmp / "pkg-inc",
+                                 previous=dest, jobs=jobs, profile=profile), repeat)
+        zip_path = state["pkg"][0]
+        phases["hash"] = _timed(lambda: sha256_of(zip_path), repeat)
+        phases["entry_hash"] = _timed(lambda: entry_manifest(zip_path, jobs=jobs), repeat)
+        phases["evidence"] = _timed(_evidence, repeat)
+
+        def _run_fresh():
+            shutil.rmtree(base / "out", ignore_errors=True)
+            res = run_once("bench", lambda: False, base, profile=profile)
+            if not res.ok:
+                raise RuntimeError(res.error)
+        phases["run_once"] = _timed(_run_fresh, repeat)
+        phases["run_once_cached"] = _timed(lambda: run_once("bench", lambda: False, base, profile=profile), repeat)
+
+        zip_size = state["pkg"][2]
+        for key in ("compress", "compress_incremental", "hash"):
+            s = phases[key]["s"] or 1e-9
+            phases[key]["mb_s"] = round(info["bytes"] / s / 1e6, 2)
+            phases[key]["files_s"] = round(info["files"] / s, 1)
+        return {"files": info["files"], "bytes": info["bytes"], "zip_size": zip_size, "phases": phases}
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+def run_bench(shapes: List[str], repeat: int = 3, jobs: int = 0, profile: str = DEFAULT_PROFILE,
+              scale: float = 1.0, workdir: Optional[Path] = None) -> Dict[str, object]:
+    results: Dict[str, object] = {}
+    for name in shapes:
+        shape = dict(SHAPES[name])
+        shape["files"] = max(1, int(shape["files"] * scale)) if name != "huge" else shape["files"]
+        if name == "huge":
+            shape["size"] = max(1024, int(shape["size"] * scale))
+        results[name] = bench_shape(name, shape, repeat, jobs, profile, workdir)
+    return {
+        "version": BENCH_VERSION,
+        "meta": {
+            "ts_utc": datetime.now(timezone.utc).isoformat(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "repeat": repeat, "jobs": jobs, "profile": profile, "scale": scale,
+        },
+        "results": results,
+    }
+
+def compare(current: dict, baseline: dict, threshold: float = 0.15, min_abs_s: float = 0.005) -> List[str]:
+    """Regressziók: fázisidő > alapvonal * (1 + threshold) ÉS legalább min_abs_s-mal lassabb."""
+    out: List[str] = []
+    for shape, cur in (current.get("results") or {}).items():
+        base = (baseline.get("results") or {}).get(shape)
+        if not base:
+            continue
+        for phase, c in cur["phases"].items():
+            b = base["phases"].get(phase)
+            if not b:
+                continue
+            cs, bs = float(c["s"]), float(b["s"])
+            if cs > bs * (1.0 + threshold) and cs - bs >= min_abs_s:
+                out.append(f"REGRESSZIÓ {shape}/{phase}: {bs:.4f}s → {cs:.4f}s (+{(cs / bs - 1) * 100 if bs else 0:.0f}%)")
+    return out
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m runner.bench", description="run_once csomagolási benchmark")
+    ap.add_argument("--shapes", default=",".join(SHAPES), help="vesszővel: " + ", ".join(SHAPES))
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--jobs", type=int, default=0, help="tömörítő szálak (0 = CPU-szám)")
+    ap.add_argument("--profile", default=DEFAULT_PROFILE)
+    ap.add_argument("--scale", type=float, default=1.0, help="fájlszám / méret szorzó")
+    ap.add_argument("--workdir", type=Path, default=None, help="ideiglenes fák helye")
+    ap.add_argument("--out", type=Path, default=None, help="JSON eredmény fájlba (különben stdout)")
+    ap.add_argument("--compare", type=Path, default=None, help="alapvonal JSON; regresszió esetén exit 1")
+    ap.add_argument("--threshold", type=float, default=0.15)
+    args = ap.parse_args(argv)
+
+    shapes = [s.strip() for s in args.shapes.split(",") if s.strip()]
+    unknown = [s for s in shapes if s not in SHAPES]
+    if unknown:
+        ap.error(f"ismeretlen alakzat: {', '.join(unknown)}")
+    report = run_bench(shapes, args.repeat, args.jobs, args.profile, args.scale, args.workdir)
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.out:
+        args.out.write_text(text, encoding="utf-8")
+    else:
+        print(text)
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))
+        regressions = compare(report, baseline, args.threshold)
+        for line in regressions:
+            print(line, file=sys.stderr)
+        if regressions:
+            return 1
+        print("Nincs regresszió.", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,56 @@
+
+from __future__ import annotations
+from pathlib import Path
+from typing import Optional
+import json, os, threading
+
+# Csomag-gyorsítótár indexe: fingerprint → korábbi sikeres futás bizonyítéka.
+CACHE_INDEX = "pack_cache.json"
+CACHE_VERSION = 1
+MAX_ENTRIES = 50
+
+# Párhuzamos futások (runner.scheduler) ne veszítsék el egymás bejegyzéseit
+_lock = threading.Lock()
+
+def _load_index(out_dir: Path) -> dict:
+    try:
+        obj = json.loads((out_dir / CACHE_INDEX).read_text(encoding="utf-8"))
+        if obj.get("version") == CACHE_VERSION and isinstance(obj.get("entries"), dict):
+            return obj
+    except Exception:
+        pass
+    return {"version": CACHE_VERSION, "entries": {}}
+
+def lookup(out_dir: Path, fingerprint: str) -> Optional[dict]:
+    """A fingerprinthez tartozó bizonyíték, ha a zip még létezik és érintetlen (méret + mtime)."""
+    ev = _load_index(out_dir)["entries"].get(fingerprint)
+    if not isinstance(ev, dict):
+        return None
+    try:
+        st = Path(ev["zip"]).stat()
+    except (KeyError, OSError):
+        return None
+    if st.st_size != ev.get("size") or st.st_mtime_ns != ev.get("zip_mtime_ns"):
+        return None
+    return ev
+
+def store(out_dir: Path, fingerprint: str, evidence: dict) -> None:
+    """Sikeres futás bizonyítékának rögzítése; atomikus csere, legfeljebb MAX_ENTRIES bejegyzés."""
+    with _lock:
+        _store(out_dir, fingerprint, evidence)
+
+def _store(out_dir: Path, fingerprint: str, evidence: dict) -> None:
+    idx = _load_index(out_dir)
+    entries = idx["entries"]
+    ev = dict(evidence)
+    ev.pop("files", None)  # a teljes lista az evidence.json-ban marad
+    ev.pop("metrics", None)
+    ev["zip_mtime_ns"] = Path(ev["zip"]).stat().st_mtime_ns
+    entries.pop(fingerprint, None)
+    entries[fingerprint] = ev
+    while len(entries) > MAX_ENTRIES:
+        entries.pop(next(iter(entries)))
+    out_dir.mkdir(parents=True, exist_ok=True)
+    tmp = out_dir / f"{CACHE_INDEX}.{os.getpid()}.tmp"
+    tmp.write_text(json.dumps(idx, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp, out_dir / CACHE_INDEX)
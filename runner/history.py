@@ -0,0 +1,180 @@
+"""Futási előzmények: out/history.jsonl (append-only napló) + SQLite index mellette.
+
+- Egyetlen író: HistoryStore.append (a runner hívja); a GUI csak olvas (SHARED zár).
+  Ha olvasáskor a JSONL-nek van még nem indexelt vége, az külön BEGIN IMMEDIATE
+  tranzakcióban kerül be (a busy timeout így érvényesül); foglalt írónál a meglévő
+  index szolgál ki.
+- Index: sha256 és ts_utc szerint → tail / lookup-by-sha / időtartomány O(log n).
+- A JSONL marad az emberi olvasásra szánt napló; az index bármikor újraépíthető belőle.
+  Első megnyitáskor a meglévő JSONL egyszer beolvasódik (migráció), később csak a
+  még nem indexelt vége (pl. régebbi verzió által hozzáfűzött sorok).
+"""
+from __future__ import annotations
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+import json, sqlite3
+
+JSONL_NAME = "history.jsonl"
+INDEX_NAME = "history.sqlite3"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts_utc TEXT,
+    sha256 TEXT,
+    entries INTEGER,
+    size INTEGER,
+    ok INTEGER,
+    line TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_sha ON runs(sha256);
+CREATE INDEX IF NOT EXISTS runs_ts ON runs(ts_utc);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+# Egy sor: (nyers JSON sor, dekódolt objektum)
+HistoryRow = Tuple[str, dict]
+
+class HistoryStore:
+    def __init__(self, out_dir: Path) -> None:
+        self.out_dir = Path(out_dir)
+        self.jsonl = self.out_dir / JSONL_NAME
+        self.index = self.out_dir / INDEX_NAME
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.index, timeout=10, isolation_level=None)
+
+    @contextmanager
+    def _db(self, write: bool = False) -> Iterator[sqlite3.Connection]:
+        if not write:
+            self._catch_up()
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        con = self._connect()
+        try:
+            if write:
+                con.executescript(_SCHEMA)
+                # Írásnál az egész szinkron + hozzáfűzés egy zárolt tranzakció (egy író).
+                con.execute("BEGIN IMMEDIATE")
+                self._sync(con)
+            else:
+                # Olvasó: csak SHARED zár, soha nem lép elő íróvá
+                con.execute("BEGIN")
+            yield con
+            con.execute("COMMIT")
+        except BaseException:
+            if con.in_transaction:
+                con.execute("ROLLBACK")
+            raise
+        finally:
+            con.close()
+
+    def _catch_up(self) -> None:
+        """Hiányzó index / nem indexelt JSONL-vég pótlása olvasás előtt, külön írótranzakcióban."""
+        try:
+            size: Optional[int] = self.jsonl.stat().st_size
+        except OSError:
+            size = None
+        if self.index.exists():
+            con = self._connect()
+            try:
+                offset = self._offset(con)
+            except sqlite3.Error:
+                offset = -1  # még nincs séma
+            finally:
+                con.close()
+            if offset >= 0 and (size is None or size == offset):
+                return
+        try:
+            with self._db(write=True):
+                pass
+        except sqlite3.OperationalError:
+            pass  # író tartja a zárat: a meglévő index szolgál ki
+
+    def _offset(self, con: sqlite3.Connection) -> int:
+        row = con.execute("SELECT value FROM meta WHERE key='jsonl_offset'").fetchone()
+        return int(row[0]) if row else 0
+
+    def _sync(self, con: sqlite3.Connection) -> None:
+        """A JSONL még nem indexelt végének beolvasása (első alkalommal: teljes migráció)."""
+        try:
+            size = self.jsonl.stat().st_size
+        except OSError:
+            return
+        offset = self._offset(con)
+        if size < offset:
+            # A napló rövidebb lett (kézi csere) – index újraépítése
+            con.execute("DELETE FROM runs")
+            offset = 0
+        if size == offset:
+            return
+        with self.jsonl.open("rb") as f:
+            f.seek(offset)
+            data = f.read(size - offset)
+        end = data.rfind(b"\n") + 1  # csak teljes sorok
+        for raw in data[:end].splitlines():
+            self._insert(con, raw.decode("utf-8", errors="replace").strip())
+        con.execute("INSERT OR REPLACE INTO meta(key, value) VALUES('jsonl_offset', ?)", (str(offset + end),))
+
+    @staticmethod
+    def _insert(con: sqlite3.Connection, line: str) -> None:
+        if not line:
+            return
+        try:
+            obj = json.loads(line)
+        except Exception:
+            return
+        if not isinstance(obj, dict):
+            return
+        con.execute(
+            "INSERT INTO runs(ts_utc, sha256, entries, size, ok, line) VALUES(?,?,?,?,?,?)",
+            (obj.get("ts_utc"), obj.get("sha256"), obj.get("entries"), obj.get("size"),
+             1 if obj.get("ok", True) else 0, line),
+        )
+
+    def append(self, record: dict) -> None:
+        """Egy futás rögzítése: JSONL hozzáfűzés + index, egy tranzakcióban."""
+        line = json.dumps(record, ensure_ascii=False)
+        with self._db(write=True) as con:
+            with self.jsonl.open("ab+") as f:
+                # Félbeszakadt utolsó sor ne olvadjon össze az újjal
+                prefix = b""
+                if f.seek(0, 2) > 0:
+                    f.seek(-1, 2)
+                    prefix = b"" if f.read(1) == b"\n" else b"\n"
+                f.write(prefix + (line + "\n").encode("utf-8"))
+                end = f.tell()
+            self._insert(con, line)
+            con.execute("INSERT OR REPLACE INTO meta(key, value) VALUES('jsonl_offset', ?)", (str(end),))
+
+    @staticmethod
+    def _rows(cur) -> List[HistoryRow]:
+        return [(line, json.loads(line)) for (line,) in cur]
+
+    def tail(self, n: int = 10) -> List[HistoryRow]:
+        """Az utolsó n futás, időrendben (legrégebbi elöl)."""
+        with self._db() as con:
+            rows = self._rows(con.execute("SELECT line FROM runs ORDER BY id DESC LIMIT ?", (int(n),)))
+        rows.reverse()
+        return rows
+
+    def by_sha(self, sha256: str) -> List[HistoryRow]:
+        """Minden futás adott csomag-SHA-val, időrendben."""
+        with self._db() as con:
+            return self._rows(con.execute("SELECT line FROM runs WHERE sha256=? ORDER BY id", (sha256,)))
+
+    def latest_by_sha(self, sha256: str) -> Optional[HistoryRow]:
+        with self._db() as con:
+            rows = self._rows(con.execute("SELECT line FROM runs WHERE sha256=? ORDER BY id DESC LIMIT 1", (sha256,)))
+        return rows[0] if rows else None
+
+    def between(self, ts_from: str, ts_to: str, limit: int = 1000) -> List[HistoryRow]:
+        """Futások ts_from <= ts_utc < ts_to között (ISO-8601 UTC szövegek), időrendben."""
+        with self._db() as con:
+            return self._rows(con.execute(
+                "SELECT line FROM runs WHERE ts_utc >= ? AND ts_utc < ? ORDER BY ts_utc, id LIMIT ?",
+                (ts_from, ts_to, int(limit))))
+
+    def count(self) -> int:
+        with self._db() as con:
+            return int(con.execute("SELECT COUNT(*) FROM runs").fetchone()[0])
@@ -1,54 +1,477 @@
 
 from __future__ import annotations
 from pathlib import Path
-from typing import Sequence, Tuple
-import zipfile
+from typing import Deque, Dict, Iterator, NamedTuple, Optional, Sequence, Tuple
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import hashlib, json, os, re, struct, time, zipfile, zlib
+from .proof import EVIDENCE_NAME, HashingWriter, sha256_of
+from .abort import AbortFlag, Aborted, check
+from .progress import FileProgress, ProgressCallback
 
 DEFAULT_EXCLUDES = ["**/__pycache__/**", "**/*.pyc", ".git/**", "out/**"]
 
-def _is_excluded(rel: Path, exclude_globs: Sequence[str]) -> bool:
-    s = rel.as_posix()
-    for pat in exclude_globs:
-        if rel.match(pat) or Path(s).match(pat):
-            return True
-    return False
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+# A csomagformátum változásakor növelendő (a fingerprint része).
+PACK_FORMAT = 2
+
+# Tömörítési profilok (bejegyzésenkénti módszerválasztás, ld. _choose_method):
+# - fast: deflate 1
+# - balanced: deflate, zlib alapszint (6) – alapértelmezett
+# - max: deflate 9; >= _LARGE_BYTES szövegre bzip2, binárisra LZMA
+#   (a bzip2/LZMA bejegyzéseket a Windows Intéző beépített zip-kezelője nem nyitja meg)
+# Minden profilban STORED a már tömörített formátumokra és a nem tömöríthető tartalomra.
+PROFILES = {
+    "fast": {"level": 1, "strong": False},
+    "balanced": {"level": None, "strong": False},
+    "max": {"level": 9, "strong": True},
+}
+DEFAULT_PROFILE = "balanced"
+STORED_EXT = {
+    ".zip", ".rar", ".7z", ".gz", ".tgz", ".bz2", ".xz", ".zst", ".lz4",
+    ".png", ".jpg", ".jpeg", ".gif", ".webp", ".avif", ".heic",
+    ".mp3", ".ogg", ".flac", ".mp4", ".mkv", ".webm", ".mov",
+    ".docx", ".xlsx", ".pptx", ".odt", ".jar", ".whl", ".woff", ".woff2",
+}
+_PROBE_BYTES = 4096
+_PROBE_MIN = 512
+_PROBE_RATIO = 0.95
+_LARGE_BYTES = 64 * 1024
+# Ennél frissebb mtime mellett a fingerprint nem megbízható (mtime-felbontás); ugyanez
+# az előző csomag létrehozásához képest az inkrementális újrahasznosításnál.
+_RACY_NS = 2_000_000_000
+_CHUNK = 1024 * 1024
+# Ennél nagyobb fájl nem kerül egészében memóriába: az író szál streameli (zf.open "w");
+# a párhuzamos ablakban várakozó tömörített adat összesen legfeljebb _WINDOW_BYTES
+STREAM_BYTES = 4 * 1024 * 1024
+_WINDOW_BYTES = 64 * 1024 * 1024
+# A nyers (újratömörítés nélküli) írás a zipfile belső elemeire épül; ha egy Python-verzióból
+# hiányoznak, minden bejegyzés a nyilvános API-n (zf.open "w") megy, előző csomag újrahasznosítása nélkül
+_RAW_API = (all(hasattr(zipfile, a) for a in ("_get_compressor", "_FH_FILENAME_LENGTH", "_FH_EXTRA_FIELD_LENGTH"))
+            and hasattr(zipfile.ZipFile, "_writecheck"))
+# Windows-on a Path rendezés kis-nagybetű érzéketlen; ehhez igazodunk.
+_SORT_KEY = (lambda item: item[0].lower()) if os.name == "nt" else (lambda item: item[0])
+
+def _glob_part_to_regex(part: str) -> str:
+    out, i, n = [], 0, len(part)
+    while i < n:
+        c = part[i]
+        if c == "*":
+            out.append("[^/]*")
+        elif c == "?":
+            out.append("[^/]")
+        elif c == "[":
+            k = i + 1
+            if part[k:k + 1] in ("!", "]"):
+                k += 1
+            j = part.find("]", k)
+            if j < 0:
+                out.append("\\[")
+            else:
+                body = part[i + 1:j]
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                out.append("[" + body.replace("\\", "\\\\") + "]")
+                i = j
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return "".join(out)
+
+def _glob_to_regex(pat: str) -> str:
+    """Glob → regex. '*' és '?' nem lép át '/'-t, '**' tetszőleges mélységű mappát jelent.
+    A minta bármely mélységben illeszkedhet (pl. '.git/**' a gui/.git/ alatt is)."""
+    parts = [p for p in pat.strip("/").split("/") if p]
+    out = "(?:.*/)?"
+    for i, part in enumerate(parts):
+        last = i == len(parts) - 1
+        if part == "**":
+            out += ".*" if last else "(?:[^/]+/)*"
+        else:
+            out += _glob_part_to_regex(part) + ("" if last else "/")
+    return out
+
+class ExcludeMatcher:
+    """A kizáró globok egyetlen lefordított regexként.
+    - files: a teljes relatív útra (posix) illeszt
+    - dirs: a '/**' végű minták előtagja; az illeszkedő mappába be sem lépünk
+    Windows-on (mint a Path.match) kis-nagybetű érzéketlen."""
+
+    def __init__(self, globs: Sequence[str]) -> None:
+        flags = re.IGNORECASE if os.name == "nt" else 0
+        file_res = [_glob_to_regex(g) for g in globs if g.strip("/")]
+        dir_res = [_glob_to_regex(g[:-3]) for g in globs if g.endswith("/**") and g[:-3].strip("/")]
+        self._files = re.compile("|".join(f"(?:{r})" for r in file_res), flags) if file_res else None
+        self._dirs = re.compile("|".join(f"(?:{r})" for r in dir_res), flags) if dir_res else None
+
+    def file_excluded(self, rel_posix: str) -> bool:
+        return self._files is not None and self._files.fullmatch(rel_posix) is not None
+
+    def dir_excluded(self, rel_posix: str) -> bool:
+        return self._dirs is not None and self._dirs.fullmatch(rel_posix) is not None
+
+def _scan_dir(abs_dir: str, rel_dir: str, matcher: ExcludeMatcher) -> Iterator[str]:
+    # Egyszerre csak az aktuális mappa listája van memóriában; a sorrend azonos
+    # a sorted(rglob()) sorrendjével (részenkénti összehasonlítás).
+    try:
+        with os.scandir(abs_dir) as it:
+            items = sorted(((e.name, e) for e in it), key=_SORT_KEY)
+    except OSError:
+        return
+    for name, entry in items:
+        rel = f"{rel_dir}/{name}"
+        try:
+            if entry.is_dir(follow_symlinks=False):
+                if not matcher.dir_excluded(rel):
+                    yield from _scan_dir(entry.path, rel, matcher)
+            elif entry.is_file() and not matcher.file_excluded(rel):
+                yield rel
+        except OSError:
+            continue
+
+def iter_package_files(base: Path,
+                       include_dirs: Sequence[str],
+                       exclude_globs: Sequence[str] = ()) -> Iterator[Path]:
+    """Lusta, rendezett bejárás (os.scandir): a base-hez relatív fájlutak, a
+    DEFAULT_EXCLUDES + exclude_globs kizárásával; a kizárt mappákba nem lép be."""
+    base = base.resolve()
+    matcher = ExcludeMatcher(list(DEFAULT_EXCLUDES) + list(exclude_globs or ()))
+    for d in include_dirs:
+        p = (base / d).resolve()
+        if not p.is_dir():
+            continue
+        rel_dir = p.relative_to(base).as_posix()
+        if matcher.dir_excluded(rel_dir):
+            continue
+        for rel in _scan_dir(str(p), rel_dir, matcher):
+            yield Path(rel)
+
+class TreeFingerprint(NamedTuple):
+    fingerprint: str
+    cacheable: bool
+    files: int
+    bytes: int
+
+def tree_fingerprint(base: Path,
+                     include_dirs: Sequence[str],
+                     exclude_globs: Sequence[str],
+                     profile: str = DEFAULT_PROFILE,
+                     abort_flag: AbortFlag = None) -> TreeFingerprint:
+    """
+    Olcsó fingerprint a bemeneti fáról: konfiguráció + minden fájl (path, size, mtime_ns).
+    Csak stat, tartalmat nem olvas.
+    Vissza: TreeFingerprint – cacheable hamis, ha valamelyik fájl túl friss ahhoz,
+    hogy egy azonos méretű későbbi módosítást az mtime kimutasson; files/bytes a
+    csomagolandó fájlok száma és összmérete (haladásjelzéshez).
+    """
+    base = base.resolve()
+    h = hashlib.sha256()
+    h.update(json.dumps({
+        "format": PACK_FORMAT,
+        "profile": profile,
+        "include": list(include_dirs),
+        "exclude": list(DEFAULT_EXCLUDES) + list(exclude_globs or ()),
+    }).encode("utf-8"))
+    racy_after = time.time_ns() - _RACY_NS
+    cacheable = True
+    files = total = 0
+    for rel in iter_package_files(base, include_dirs, exclude_globs):
+        check(abort_flag, "fingerprint", files)
+        st = (base / rel).stat()
+        if st.st_mtime_ns >= racy_after:
+            cacheable = False
+        h.update(f"\0{rel.as_posix()}\0{st.st_size}\0{st.st_mtime_ns}".encode("utf-8"))
+        files += 1
+        total += st.st_size
+    return TreeFingerprint(h.hexdigest(), cacheable, files, total)
+
+def load_manifest(pkg_dir: Path) -> Dict[str, dict]:
+    """Egy csomag manifestje: {arcname: {size, mtime_ns, crc32, sha256, profile}}, zip-sorrendben; hiba esetén üres."""
+    try:
+        obj = json.loads((pkg_dir / MANIFEST_NAME).read_text(encoding="utf-8"))
+        if obj.get("version") != MANIFEST_VERSION:
+            return {}
+        return dict(obj.get("entries") or {})
+    except Exception:
+        return {}
+
+def _write_manifest(dest_dir: Path, entries: Dict[str, dict]) -> Path:
+    p = dest_dir / MANIFEST_NAME
+    p.write_text(json.dumps({"version": MANIFEST_VERSION, "entries": entries}, ensure_ascii=False), encoding="utf-8")
+    return p
+
+def _sha256_file(path: Path, abort_flag: AbortFlag = None) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(_CHUNK), b""):
+            check(abort_flag)
+            h.update(chunk)
+    return h.hexdigest()
+
+def _read_raw(fp, info: zipfile.ZipInfo) -> bytes:
+    """Egy bejegyzés tömörített (nyers) adata a forrás zip-ből, kitömörítés nélkül."""
+    fp.seek(info.header_offset)
+    fh = struct.unpack(zipfile.structFileHeader, fp.read(zipfile.sizeFileHeader))
+    fp.seek(fh[zipfile._FH_FILENAME_LENGTH] + fh[zipfile._FH_EXTRA_FIELD_LENGTH], os.SEEK_CUR)
+    return fp.read(info.compress_size)
+
+def _write_raw(zf: zipfile.ZipFile, zinfo: zipfile.ZipInfo, raw: bytes) -> None:
+    """Már tömörített adat beírása; ugyanazt a bájtsort adja, mint a ZipFile.write,
+    de fejléc-visszaírás nélkül, így a kimenet egyetlen szekvenciális írás."""
+    zip64 = zinfo.file_size * 1.05 > zipfile.ZIP64_LIMIT
+    zinfo.flag_bits = 0x00
+    if zinfo.compress_type == zipfile.ZIP_LZMA:
+        zinfo.flag_bits |= 0x02
+    if not zinfo.external_attr:
+        zinfo.external_attr = 0o600 << 16
+    zf.fp.seek(zf.start_dir)
+    zinfo.header_offset = zf.fp.tell()
+    zf._writecheck(zinfo)
+    zf._didModify = True
+    zf.fp.write(zinfo.FileHeader(zip64))
+    zf.fp.write(raw)
+    zf.start_dir = zf.fp.tell()
+    zf.filelist.append(zinfo)
+    zf.NameToInfo[zinfo.filename] = zinfo
+
+def _set_level(zinfo: zipfile.ZipInfo, level: Optional[int]) -> None:
+    # 3.13-tól nyilvános compress_level (a _compresslevel ennek álneve)
+    if hasattr(zinfo, "compress_level"):
+        zinfo.compress_level = level
+    else:
+        zinfo._compresslevel = level
+
+def _stream_file(zf: zipfile.ZipFile, zinfo: zipfile.ZipInfo, abs_path: Path, size: int, profile: str,
+                 abort_flag: AbortFlag = None) -> str:
+    """Író szál: egy (nagy) fájl streamelése a zip-be a nyilvános API-val, blokkonként.
+    Vissza: sha256. (A fejléc-visszaírás miatt a zip hash-ét ilyenkor utólag számoljuk.)"""
+    h = hashlib.sha256()
+    with abs_path.open("rb") as f:
+        chunk = f.read(_CHUNK)
+        zinfo.compress_type, level = _choose_method(abs_path.name, size, chunk, profile)
+        _set_level(zinfo, level)
+        zinfo.file_size = size
+        with zf.open(zinfo, "w", force_zip64=size * 1.05 > zipfile.ZIP64_LIMIT) as w:
+            while chunk:
+                check(abort_flag)
+                h.update(chunk)
+                w.write(chunk)
+                chunk = f.read(_CHUNK)
+    return h.hexdigest()
+
+def _choose_method(name: str, size: int, head: bytes, profile: str) -> Tuple[int, Optional[int]]:
+    """Módszer egy bejegyzésre: kiterjesztés + az első néhány KB gyors tömöríthetőségi próbája.
+    Vissza: (compress_type, level)."""
+    if os.path.splitext(name)[1].lower() in STORED_EXT:
+        return zipfile.ZIP_STORED, None
+    probe = head[:_PROBE_BYTES]
+    if len(probe) >= _PROBE_MIN and len(zlib.compress(probe, 1)) > len(probe) * _PROBE_RATIO:
+        return zipfile.ZIP_STORED, None
+    prof = PROFILES[profile]
+    if prof["strong"] and size >= _LARGE_BYTES:
+        return (zipfile.ZIP_BZIP2, 9) if b"\0" not in probe else (zipfile.ZIP_LZMA, None)
+    return zipfile.ZIP_DEFLATED, prof["level"]
+
+def _compress_file(abs_path: Path, size: int, profile: str,
+                   abort_flag: AbortFlag = None) -> Tuple[bytes, int, int, str, int, Optional[int]]:
+    """Worker: egy fájl tömörítése memóriába; a módszert az első olvasott blokk alapján választja.
+    abort_flag blokkonként (1 MiB) ellenőrizve. Vissza: (nyers adat, CRC32, méret, sha256, compress_type, level)."""
+    h = hashlib.sha256()
+    crc = 0
+    n = 0
+    parts: list[bytes] = []
+    with abs_path.open("rb") as f:
+        chunk = f.read(_CHUNK)
+        compress_type, level = _choose_method(abs_path.name, size, chunk, profile)
+        comp = zipfile._get_compressor(compress_type, level)
+        while chunk:
+            check(abort_flag)
+            h.update(chunk)
+            crc = zlib.crc32(chunk, crc)
+            n += len(chunk)
+            parts.append(comp.compress(chunk) if comp else chunk)
+            chunk = f.read(_CHUNK)
+    if comp:
+        parts.append(comp.flush())
+    return b"".join(parts), crc, n, h.hexdigest(), compress_type, level
 
 def make_package(base: Path,
                  include_dirs: Sequence[str],
                  exclude_globs: Sequence[str],
-                 dest_dir: Path) -> Tuple[Path, int, int]:
+                 dest_dir: Path,
+                 previous: Optional[Path] = None,
+                 jobs: int = 1,
+                 profile: str = DEFAULT_PROFILE,
+                 abort_flag: AbortFlag = None,
+                 progress: ProgressCallback = None,
+                 totals: Optional[Tuple[int, int]] = None) -> Tuple[Path, int, int, str]:
     """
     Létrehozza dest_dir alatt a package.zip-et.
     - Csak base alatti relatív fájlok
-    - Kizárások: **/__pycache__/**, **/*.pyc, .git/**, out/** (mint minimum)
-    - Tömörítés: ZIP_DEFLATED
-    Vissza: (zip_path, entries, size_bytes)
+    - Kizárások: **/__pycache__/**, **/*.pyc, .git/**, out/** (mint minimum),
+      lefordított mintával; a kizárt mappákat nem járjuk be (iter_package_files)
+    - Tömörítés: profile szerint (PROFILES: fast / balanced / max), bejegyzésenként
+      STORED / deflate szint / bzip2 / LZMA a kiterjesztés és egy gyors próba alapján
+    - Inkrementális: ha previous egy korábbi csomag mappája (package.zip + manifest.json),
+      a változatlan fájlok (méret+mtime, vagy eltérő mtime mellett azonos SHA-256)
+      tömörített bájtjai újratömörítés nélkül átmásolódnak (csak azonos profil esetén,
+      és csak ha a rögzített mtime legalább _RACY_NS-sel régebbi az előző csomagnál).
+    - Párhuzamos mód: jobs > 1 (vagy jobs <= 0 = CPU-szám) esetén szálkészlet tömörít
+      (a zlib elengedi a GIL-t), egyetlen író rendezett sorrendben ír; a kimenet
+      bájtra azonos a soros úttal. STREAM_BYTES feletti fájl nem kerül memóriába: az író
+      streameli (zf.open "w"), a várakozó ablak összmérete _WINDOW_BYTES-ra korlátos.
+    - Mellé kerül a manifest.json (path, size, mtime_ns, crc32, sha256) a következő futásnak
+      és a bizonyíték bejegyzésenkénti listájához.
+    - A zip SHA-256-ja írás közben készül (HashingWriter), nincs utólagos visszaolvasás.
+    - abort_flag: fájlonként és 1 MiB-os blokkonként ellenőrizve; megszakításkor Aborted
+      ("package", kész bejegyzések száma), a félkész package.zip.tmp törlődik.
+    - progress: ProgressEvent("file", "package", ...) a megírt bejegyzésekről (ritkítva);
+      totals = (fájlok, bájtok), ha ismert (pl. a tree_fingerprint-ből).
+    Vissza: (zip_path, entries, size_bytes, sha256)
     """
+    if profile not in PROFILES:
+        raise ValueError(f"Ismeretlen tömörítési profil: {profile!r} (lehet: {', '.join(PROFILES)})")
     base = base.resolve()
     dest_dir.mkdir(parents=True, exist_ok=True)
     zip_path = dest_dir / "package.zip"
+    tmp_path = dest_dir / "package.zip.tmp"
 
-    excludes = list(DEFAULT_EXCLUDES) + list(exclude_globs or ())
-
-    file_list: list[Path] = []
-    for d in include_dirs:
-        p = (base / d).resolve()
-        if not p.exists() or not p.is_dir():
-            continue
-        for f in sorted(p.rglob("*")):
-            if f.is_file():
-                rel = f.relative_to(base)
-                if _is_excluded(rel, excludes):
-                    continue
-                file_list.append(rel)
+    # Előző csomag: csak akkor használjuk, ha a manifest és a zip is olvasható
+    prev_manifest: Dict[str, dict] = {}
+    prev_zf: Optional[zipfile.ZipFile] = None
+    # Az előző csomag idejéhez (a manifest a fájlok beolvasása után íródik) túl közeli
+    # mtime-ú bejegyzés "racy": azonos tickben, azonos mérettel átírva is egyezne
+    racy_after = 0
+    if previous is not None:
+        prev_manifest = load_manifest(previous)
+        if prev_manifest:
+            try:
+                racy_after = (previous / MANIFEST_NAME).stat().st_mtime_ns - _RACY_NS
+                prev_zf = zipfile.ZipFile(previous / "package.zip", "r")
+            except Exception:
+                prev_manifest, prev_zf = {}, None
 
+    tracker = FileProgress(progress, "package", *(totals or (None, None)))
+    workers = (os.cpu_count() or 1) if jobs <= 0 else jobs
+    window = workers * 4 if workers > 1 else 0
+    manifest: Dict[str, dict] = {}
     entries = 0
-    with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
-        for rel in file_list:
-            abs_path = base / rel
-            arcname = rel.as_posix()
-            zf.write(abs_path, arcname)
-            entries += 1
+    pool: Optional[ThreadPoolExecutor] = None
+    pending: Deque[tuple] = deque()
+    try:
+        if workers > 1 and _RAW_API:
+            pool = ThreadPoolExecutor(max_workers=workers)
+        # Ideiglenes fájlba írunk: az előző csomag lehet ugyanebben a mappában.
+        # A hash-tee miatt a zip írása tisztán szekvenciális (nincs fejléc-visszaírás).
+        tmp_fp = tmp_path.open("wb")
+        tee = HashingWriter(tmp_fp)
+        with tmp_fp, zipfile.ZipFile(tee, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+            raw_ok = _RAW_API and hasattr(zf, "start_dir") and hasattr(zf, "_didModify")
+            if not raw_ok:
+                prev_manifest = {}
+            # Sorrendtartó ablak: a workerek tömörítenek, az író egyetlen szál, rendezett sorrendben.
+            # Az ablak darabszámra és a várakozó fájlok összméretére is korlátos.
+            queued_bytes = 0
+
+            def _drain(limit: int) -> None:
+                nonlocal entries, queued_bytes
+                while len(pending) > limit or (pending and queued_bytes > _WINDOW_BYTES):
+                    abs_path, st, zinfo, old_info, sha, fut = pending.popleft()
+                    if fut is not None:
+                        queued_bytes -= st.st_size
+                    if old_info is not None:
+                        zinfo.compress_type = old_info.compress_type
+                        zinfo.file_size = old_info.file_size
+                        zinfo.compress_size = old_info.compress_size
+                        zinfo.CRC = old_info.CRC
+                        _write_raw(zf, zinfo, _read_raw(prev_zf.fp, old_info))
+                    elif fut is None and (not raw_ok or st.st_size > STREAM_BYTES):
+                        sha = _stream_file(zf, zinfo, abs_path, st.st_size, profile, abort_flag)
+                    else:
+                        if fut is not None:
+                            raw, crc, n, sha, ctype, level = fut.result()
+                        else:
+                            raw, crc, n, sha, ctype, level = _compress_file(abs_path, st.st_size, profile, abort_flag)
+                        zinfo.compress_type = ctype
+                        _set_level(zinfo, level)
+                        zinfo.file_size = n
+                        zinfo.compress_size = len(raw)
+                        zinfo.CRC = crc
+                        _write_raw(zf, zinfo, raw)
+                    manifest[zinfo.filename] = {"size": zinfo.file_size, "mtime_ns": st.st_mtime_ns,
+                                                "crc32": zinfo.CRC, "sha256": sha, "profile": profile}
+                    entries += 1
+                    tracker.advance(zinfo.filename, zinfo.file_size)
+
+            for rel in iter_package_files(base, include_dirs, exclude_globs):
+                check(abort_flag)
+                abs_path = base / rel
+                arcname = rel.as_posix()
+                st = abs_path.stat()
+                zinfo = zipfile.ZipInfo.from_file(abs_path, arcname)
 
+                old = prev_manifest.get(arcname)
+                old_info = prev_zf.NameToInfo.get(arcname) if (old and prev_zf) else None
+                sha = None
+                # Racy bejegyzés: nincs nyers másolás, újratömörítjük
+                if old_info is not None and old.get("size") == st.st_size \
+                        and old_info.file_size == st.st_size \
+                        and old.get("profile") == profile \
+                        and int(old.get("mtime_ns") or 0) < racy_after:
+                    if old.get("mtime_ns") == st.st_mtime_ns:
+                        sha = old.get("sha256")
+                    elif _sha256_file(abs_path, abort_flag) == old.get("sha256"):
+                        sha = old.get("sha256")
+                if not sha:
+                    old_info = None
+                fut = None
+                if old_info is None and pool is not None and st.st_size <= STREAM_BYTES:
+                    fut = pool.submit(_compress_file, abs_path, st.st_size, profile, abort_flag)
+                    queued_bytes += st.st_size
+                pending.append((abs_path, st, zinfo, old_info, sha, fut))
+                _drain(window)
+            _drain(0)
+    except Aborted:
+        tmp_path.unlink(missing_ok=True)
+        raise Aborted("package", entries) from None
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    finally:
+        if pool is not None:
+            # (shutdown(cancel_futures=...) csak 3.9-től) – a még el nem indultakat kézzel töröljük
+            for item in pending:
+                if item[5] is not None:
+                    item[5].cancel()
+            pool.shutdown(wait=True)
+        if prev_zf is not None:
+            prev_zf.close()
+
+    os.replace(tmp_path, zip_path)
+    _write_manifest(dest_dir, manifest)
     size = zip_path.stat().st_size
-    return zip_path, entries, size
+    sha = tee.hexdigest() or sha256_of(zip_path)
+    return zip_path, entries, size, sha
+
+def find_previous_package(out_dir: Path) -> Optional[Path]:
+    """A legutóbb elkészült out/run-* mappa, amelyben package.zip és manifest.json is van
+    (a manifest mtime-ja szerint – a régi perc-alapú és az új futásazonosítós nevek vegyesen
+    is jól rendeződnek, és párhuzamos futásnál a ténylegesen utolsó kész csomag nyer).
+    Csak lezárt futás számít (evidence.json megvan, a run_once utolsó lépése): egy még
+    futó vagy megszakítás miatt épp törölt mappa nem lehet alap."""
+    if not out_dir.is_dir():
+        return None
+    best: Optional[Tuple[int, str]] = None
+    found: Optional[Path] = None
+    for d in out_dir.glob("run-*"):
+        try:
+            mt = (d / MANIFEST_NAME).stat().st_mtime_ns
+        except OSError:
+            continue
+        if not ((d / "package.zip").is_file() and (d / EVIDENCE_NAME).is_file()):
+            continue
+        key = (mt, d.name)
+        if best is None or key > best:
+            best, found = key, d
+    return found
@@ -1,8 +1,15 @@
 """Patch Package v1 modul inicializáló.
 - validate_json(payload: str) -> Result
+- validate_stream(bytes | bináris fájl) -> Result, load_package(...) -> (doc, Result)
 - preflight(doc: dict) -> Result
+- parse_unified_diff(diff: str) -> DiffModel (fájl/hunk modell)
+- dry_run(doc, root) -> DryRun (memóriabeli alkalmazás overlay-en, hunkonkénti ütközésekkel)
+- apply_package(doc, root) -> Result (tranzakciós alkalmazás naplóval), recover(root)
 """
-from .result import Result, EXIT_PRE
+from .result import Result, EXIT_PRE, EXIT_APPLY
 from .schema import REQUIRED_TOP_LEVEL_KEYS, OPTIONAL_TOP_LEVEL_KEYS
-from .validator import validate_json
+from .validator import validate_json, validate_stream, load_package
+from .diff_model import DiffModel, FileDiff, Hunk, parse_unified_diff
+from .overlay import Overlay, DryRun, dry_run
 from .preflight import preflight
+from .apply import apply_package, recover
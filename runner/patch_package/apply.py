@@ -0,0 +1,354 @@
+"""Patch Package alkalmazása a working tree-re, tranzakciósan.
+
+- Előbb memóriabeli dry-run (overlay): ütközésnél a lemez érintetlen marad
+- Write-ahead napló (.git/szi-apply/<txid>/journal.json) minden érintett útvonalról;
+  az eredeti fájlok hard linkkel mentődnek (nincs adatmásolás; a visszaállítás a régi
+  inode-ot teszi vissza: tartalom, mód, mtime változatlan), ahol a link nem megy, ott
+  a tartalom kerül a naplóba
+- Írás: párhuzamos temp-fájl írás a célkönyvtárban, kötegelt fsync (előbb minden fájl,
+  a rename-ek után könyvtáranként egyszer), majd os.replace (atomi)
+- Bármilyen hibánál a napló alapján visszaáll az eredeti fa; félbeszakadt futás
+  (pl. áramszünet) naplója recover()-rel görgethető vissza
+- A preflightot nem futtatja (a hívó felelőssége), de a .git/ alá és a denylistes
+  útvonalakra itt sem ír; egy fán egyszerre egy alkalmazás fut (zárfájl a naplókönyvtárban)
+"""
+from __future__ import annotations
+import json, os, secrets, shutil, stat, time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+from .result import Result, EXIT_APPLY
+from .diff_model import DiffModel, deny_hits
+from .overlay import dry_run
+from .git_utils import invalidate_status
+from .preflight import DENY_PREFIXES
+
+DEFAULT_WORKERS = min(8, os.cpu_count() or 2)
+JOURNAL_DIR = "szi-apply"          # a .git alatt (ha van), különben a gyökérben ponttal
+JOURNAL_NAME = "journal.json"
+LOCK_NAME = "apply.lock"
+_POSIX = os.name == "posix"
+
+@dataclass
+class _Entry:
+    path: str                       # repó-relatív
+    action: str                     # "A" új, "M" módosított, "D" törölt
+    data: Optional[bytes]           # új tartalom (D-nél None)
+    tmp: Optional[str]              # temp fájl neve (a célkönyvtárban)
+    mode: Optional[str] = None      # git mód (pl. "100755")
+    backup: Optional[str] = None    # mentés neve a naplókönyvtárban
+    linked: bool = False
+    orig_mode: Optional[int] = None
+    orig_mtime_ns: Optional[int] = None
+
+def _journal_root(root: Path) -> Path:
+    git = root / ".git"
+    return git / JOURNAL_DIR if git.is_dir() else root / f".{JOURNAL_DIR}"
+
+def _fsync_path(path: Path, directory: bool = False) -> None:
+    if directory and not _POSIX:
+        return  # Windowson könyvtár nem nyitható fsync-hez
+    fd = os.open(path, os.O_RDONLY | (getattr(os, "O_DIRECTORY", 0) if directory else 0))
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def _write_journal(jdir: Path, doc: Dict[str, Any], fsync: bool) -> None:
+    tmp = jdir / (JOURNAL_NAME + ".tmp")
+    tmp.write_text(json.dumps(doc, ensure_ascii=False), encoding="utf-8")
+    if fsync:
+        _fsync_path(tmp)
+    os.replace(tmp, jdir / JOURNAL_NAME)
+    if fsync:
+        _fsync_path(jdir, directory=True)
+
+def _new_mode(git_mode: Optional[str], orig_mode: Optional[int]) -> Optional[int]:
+    """Cél jogosultság: a meglévőé marad; git módnál csak a végrehajthatóság számít."""
+    if git_mode and git_mode.isdigit() and _POSIX:
+        base = stat.S_IMODE(orig_mode) if orig_mode is not None else 0o666 & ~_umask()
+        if git_mode.endswith("755"):
+            return base | ((base & 0o444) >> 2)
+        return base & ~0o111
+    return stat.S_IMODE(orig_mode) if orig_mode is not None else None
+
+_UMASK: Optional[int] = None
+
+def _umask() -> int:
+    global _UMASK
+    if _UMASK is None:
+        _UMASK = os.umask(0o022)
+        os.umask(_UMASK)
+    return _UMASK
+
+def _rollback(root: Path, jdir: Path, journal: Dict[str, Any]) -> List[str]:
+    """Napló szerinti visszaállítás (fordított sorrendben). Vissza: a sikertelen lépések."""
+    problems: List[str] = []
+    for e in reversed(journal["entries"]):
+        target = root / e["path"]
+        try:
+            if e.get("tmp"):
+                try:
+                    os.remove(target.parent / e["tmp"])
+                except FileNotFoundError:
+                    pass
+            if e["existed"]:
+                backup = jdir / e["backup"]
+                if e.get("linked"):
+                    if backup.exists():
+                        os.replace(backup, target)
+                elif backup.exists():
+                    tmp = target.parent / f".{target.name}.{journal['txid']}.rb"
+                    shutil.copyfile(backup, tmp)
+                    if e.get("orig_mode") is not None:
+                        os.chmod(tmp, stat.S_IMODE(e["orig_mode"]))
+                    os.replace(tmp, target)
+                    if e.get("orig_mtime_ns") is not None:
+                        os.utime(target, ns=(e["orig_mtime_ns"], e["orig_mtime_ns"]))
+            else:
+                try:
+                    os.remove(target)
+                except FileNotFoundError:
+                    pass
+        except OSError as ex:
+            problems.append(f"{e['path']}: {ex}")
+    for d in sorted(journal.get("mkdirs", []), key=lambda p: -p.count("/")):
+        try:
+            os.rmdir(root / d)
+        except OSError:
+            pass  # nem üres / már nincs: marad
+    # A temp fájlok és cserék a szülőkönyvtárak mtime-ját is léptették
+    for d, mtime_ns in journal.get("dir_mtimes", {}).items():
+        try:
+            os.utime(root / d, ns=(mtime_ns, mtime_ns))
+        except OSError:
+            pass
+    return problems
+
+def _finish(jdir: Path) -> None:
+    shutil.rmtree(jdir, ignore_errors=True)
+
+def _acquire_lock(root: Path) -> Optional[Path]:
+    """Kizárólagos zárfájl (O_EXCL); None, ha már más tartja."""
+    base = _journal_root(root)
+    base.mkdir(parents=True, exist_ok=True)
+    lock = base / LOCK_NAME
+    try:
+        fd = os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        return None
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(f"{os.getpid()}\n")
+    return lock
+
+def _forbidden(rel: str) -> bool:
+    """.git bármely szinten, vagy denylistes prefix (ugyanaz a szabály, mint a preflightban;
+    a .git itt akkor is tiltott, ha a denylistából kikerülne)."""
+    return bool(deny_hits([rel], DENY_PREFIXES + (".git/",)))
+
+def recover(root: Union[str, Path, None] = None) -> List[str]:
+    """Félbeszakadt alkalmazások visszagörgetése a megmaradt naplókból. Vissza: a tx azonosítók."""
+    root = Path(root or os.getcwd())
+    base = _journal_root(root)
+    done: List[str] = []
+    if not base.is_dir():
+        return done
+    for jdir in sorted(p for p in base.iterdir() if p.is_dir()):
+        try:
+            journal = json.loads((jdir / JOURNAL_NAME).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            _finish(jdir)  # napló nélkül még semmi nem íródott a fába
+            continue
+        if journal.get("state") != "committed":
+            _rollback(root, jdir, journal)
+        _finish(jdir)
+        done.append(journal.get("txid", jdir.name))
+    # Összeomlott futás zárja (recover() csak akkor hívandó, ha nem fut alkalmazás)
+    try:
+        os.remove(base / LOCK_NAME)
+    except FileNotFoundError:
+        pass
+    return done
+
+def apply_package(doc: Dict[str, Any], root: Union[str, Path, None] = None,
+                  model: Optional[DiffModel] = None, workers: int = DEFAULT_WORKERS,
+                  fsync: bool = True) -> Result:
+    """diff_unified / new_files[] alkalmazása tranzakciósan. Vissza: Result fájlonkénti evidenciával;
+    hibánál exit_code=EXIT_APPLY és a fa az eredeti állapotában."""
+    res = Result(ok=True, exit_code=0, errors=[], evidence=[])
+    root = Path(root or os.getcwd()).resolve()
+    try:
+        lock = _acquire_lock(root)
+    except OSError as ex:
+        lock = None
+        res.add_error(f"A zárfájl nem hozható létre: {ex}")
+    else:
+        if lock is None:
+            res.add_error(f"Másik alkalmazás fut ezen a fán (zár: {_journal_root(root) / LOCK_NAME}).")
+    if lock is None:
+        res.exit_code = EXIT_APPLY
+        return res
+    try:
+        return _apply_locked(doc, root, model, workers, fsync, res)
+    finally:
+        try:
+            os.remove(lock)
+        except OSError:
+            pass
+
+def _apply_locked(doc: Dict[str, Any], root: Path, model: Optional[DiffModel], workers: int,
+                  fsync: bool, res: Result) -> Result:
+    t0 = time.perf_counter()
+    dr = dry_run(doc, root, model)
+    if not dr.ok:
+        for err in dr.errors:
+            res.add_error(f"Alkalmazás előtti ellenőrzés: {err}")
+        res.add_evidence("A working tree nem változott.")
+        res.exit_code = EXIT_APPLY
+        return res
+    changes = dr.overlay.changes()
+    if not changes:
+        res.add_evidence("Nincs tényleges változás (a csomag már alkalmazva?).")
+        return res
+
+    # A preflight kihagyása esetén se írjunk .git/ alá (pl. hooks) vagy tiltott mappába
+    for rel in changes:
+        if _forbidden(rel):
+            res.add_error(f"{rel}: tiltott cél (.git / denylist)")
+    # Symlinkelt könyvtáron át se írjunk a fán kívülre
+    for rel in changes:
+        parent = (root / rel).parent
+        while not parent.exists() and parent != root:
+            parent = parent.parent
+        if parent != root and root not in parent.resolve().parents and parent.resolve() != root:
+            res.add_error(f"{rel}: a célkönyvtár a working tree-n kívülre mutat")
+    if not res.ok:
+        res.exit_code = EXIT_APPLY
+        return res
+    if _POSIX:
+        _umask()  # a fő szálon olvassuk ki (az os.umask folyamatszintű)
+
+    txid = f"{time.strftime('%Y%m%dT%H%M%S')}-{secrets.token_hex(3)}"
+    entries: List[_Entry] = []
+    for i, (rel, data) in enumerate(sorted(changes.items())):
+        existed = dr.overlay.originals.get(rel) is not None
+        action = "D" if data is None else ("M" if existed else "A")
+        tmp = None if data is None else f".{Path(rel).name}.{txid}.tmp"
+        entries.append(_Entry(rel, action, data, tmp, dr.overlay.modes.get(rel),
+                              backup=f"b{i}" if existed else None))
+    mkdirs = sorted({str(p.relative_to(root).as_posix())
+                     for e in entries if e.data is not None
+                     for p in (root / e.path).parents
+                     if p != root and root in p.parents and not p.exists()})
+
+    jdir = _journal_root(root) / txid
+    dir_mtimes = {}
+    for e in entries:
+        parent = (root / e.path).parent
+        if parent.exists():
+            dir_mtimes[parent.relative_to(root).as_posix()] = parent.stat().st_mtime_ns
+    journal: Dict[str, Any] = {"txid": txid, "state": "prepared", "mkdirs": mkdirs,
+                               "dir_mtimes": dir_mtimes, "entries": []}
+    try:
+        jdir.mkdir(parents=True)
+        # 1) Mentések: hard link (adatmásolás nélkül), ha nem megy, a memóriabeli eredeti tartalom
+        for e in entries:
+            if e.backup is None:
+                continue
+            target = root / e.path
+            st = target.stat()
+            e.orig_mode, e.orig_mtime_ns = st.st_mode, st.st_mtime_ns
+            try:
+                os.link(target, jdir / e.backup)
+                e.linked = True
+            except OSError:
+                (jdir / e.backup).write_bytes(dr.overlay.originals[e.path])
+        journal["entries"] = [{"path": e.path, "existed": e.backup is not None, "backup": e.backup,
+                               "linked": e.linked, "tmp": e.tmp, "orig_mode": e.orig_mode,
+                               "orig_mtime_ns": e.orig_mtime_ns} for e in entries]
+        if fsync:
+            for e in entries:
+                if e.backup and not e.linked:
+                    _fsync_path(jdir / e.backup)
+        _write_journal(jdir, journal, fsync)
+    except Exception as ex:
+        _finish(jdir)
+        res.add_error(f"Napló előkészítése sikertelen: {ex}")
+        res.add_evidence("A working tree nem változott.")
+        res.exit_code = EXIT_APPLY
+        return res
+
+    current = None
+    try:
+        for d in mkdirs:
+            (root / d).mkdir(exist_ok=True)
+
+        # 2) Temp fájlok párhuzamosan; fsync kötegben (minden fájl a rename-ek előtt)
+        def _write_tmp(e: _Entry) -> None:
+            tmp = (root / e.path).parent / e.tmp
+            with open(tmp, "xb") as f:
+                f.write(e.data)
+                if fsync:
+                    f.flush()
+                    os.fsync(f.fileno())
+            mode = _new_mode(e.mode, e.orig_mode)
+            if mode is not None:
+                os.chmod(tmp, mode)
+
+        writes = [e for e in entries if e.data is not None]
+        if len(writes) > 1 and workers > 1:
+            with ThreadPoolExecutor(max_workers=min(workers, len(writes)), thread_name_prefix="apply") as pool:
+                for fut in [pool.submit(_write_tmp, e) for e in writes]:
+                    fut.result()
+        else:
+            for e in writes:
+                _write_tmp(e)
+
+        # 3) Atomi csere / törlés
+        for e in entries:
+            current = e.path
+            target = root / e.path
+            if e.data is None:
+                os.remove(target)
+            else:
+                os.replace(target.parent / e.tmp, target)
+        current = None
+        if fsync:
+            for d in sorted({(root / e.path).parent for e in entries}):
+                _fsync_path(d, directory=True)
+        journal["state"] = "committed"
+        _write_journal(jdir, journal, fsync)
+    except BaseException as ex:
+        problems = _rollback(root, jdir, journal)
+        if not isinstance(ex, Exception):  # KeyboardInterrupt / SystemExit: visszaállítva, továbbdobva
+            if not problems:
+                _finish(jdir)
+            invalidate_status(str(root))
+            raise
+        where = f"{current}: " if current else ""
+        res.add_error(f"Alkalmazás sikertelen: {where}{ex}")
+        if problems:
+            res.add_error("Visszaállítás hiányos (a napló megmaradt, recover() újrapróbálja): "
+                          + "; ".join(problems))
+        else:
+            _finish(jdir)
+            res.add_evidence("Visszaállítva: a working tree az eredeti állapotában.")
+        res.exit_code = EXIT_APPLY
+        invalidate_status(str(root))
+        return res
+
+    _finish(jdir)
+    invalidate_status(str(root))
+    total = 0
+    for e in entries:
+        size = len(e.data) if e.data is not None else 0
+        total += size
+        res.add_evidence(f"{e.action} {e.path}" + (f" ({size} bájt)" if e.data is not None else ""))
+    shifted = [h for h in dr.hunks if h.offset]
+    for h in shifted:
+        res.add_evidence(f"{h.path}: {h.index}. hunk eltolva {h.offset:+d} sorral.")
+    ms = (time.perf_counter() - t0) * 1000.0
+    res.add_evidence(f"Alkalmazva: {len(entries)} fájl, {total} bájt, {ms:.1f} ms "
+                     f"(fsync: {'be' if fsync else 'ki'}, tx: {txid}).")
+    return res
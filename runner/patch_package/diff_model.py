@@ -0,0 +1,244 @@
+"""Unified diff → tömör fájl/hunk modell, egyetlen lineáris menetben.
+
+A preflight minden diff-alapú ellenőrzése (scope, limitek, denylist) ezen a modellen fut;
+a denylist így a valódi cél-útvonalakra illeszt, nem a tartalmi sorokra.
+Támogatott: git diff (extended headerek, rename/copy, mode, binary jelzés, idézett
+útvonalak) és sima ---/+++ unidiff.
+"""
+from __future__ import annotations
+import posixpath, re
+from dataclasses import dataclass, field
+from typing import Iterable, List, Optional, Tuple
+
+_HUNK_RE = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@(.*)$")
+# Ezek a mappanevek bármely mélységben tiltottak, ha a prefixlistában szerepelnek
+# (vendor/sub/.git/config is egy repó belseje)
+ANY_DEPTH_DIRS = (".git",)
+_ESCAPES = {"a": "\a", "b": "\b", "t": "\t", "n": "\n", "v": "\v", "f": "\f", "r": "\r", '"': '"', "\\": "\\"}
+
+@dataclass
+class Hunk:
+    old_start: int
+    old_len: int
+    new_start: int
+    new_len: int
+    section: str = ""
+    # Sorok előjellel együtt: ' ' kontextus, '-' törölt, '+' új, '\\' "No newline at end of file"
+    lines: List[str] = field(default_factory=list)
+    added: int = 0
+    removed: int = 0
+
+@dataclass
+class FileDiff:
+    old_path: Optional[str]          # None: /dev/null (új fájl)
+    new_path: Optional[str]          # None: /dev/null (törölt fájl)
+    hunks: List[Hunk] = field(default_factory=list)
+    is_new: bool = False
+    is_deleted: bool = False
+    is_rename: bool = False
+    is_copy: bool = False
+    is_binary: bool = False
+    old_mode: Optional[str] = None
+    new_mode: Optional[str] = None
+    added: int = 0
+    removed: int = 0
+
+    @property
+    def path(self) -> str:
+        """A cél-útvonal (törlésnél a régi)."""
+        return self.new_path or self.old_path or ""
+
+    @property
+    def paths(self) -> Tuple[str, ...]:
+        """Minden érintett útvonal (rename/copy esetén forrás és cél is)."""
+        return tuple(p for p in dict.fromkeys((self.old_path, self.new_path)) if p)
+
+@dataclass
+class DiffModel:
+    files: List[FileDiff] = field(default_factory=list)
+    errors: List[str] = field(default_factory=list)
+
+    @property
+    def added(self) -> int:
+        return sum(f.added for f in self.files)
+
+    @property
+    def removed(self) -> int:
+        return sum(f.removed for f in self.files)
+
+    @property
+    def lines(self) -> int:
+        return self.added + self.removed
+
+    def paths(self) -> List[str]:
+        return [p for f in self.files for p in f.paths]
+
+def _unquote(s: str) -> str:
+    """Git C-stílusú idézett útvonal ("a/\\303\\241.md") → str."""
+    if not (len(s) >= 2 and s[0] == '"' and s[-1] == '"'):
+        return s
+    out = bytearray()
+    body = s[1:-1]
+    i = 0
+    while i < len(body):
+        c = body[i]
+        if c == "\\" and i + 1 < len(body):
+            n = body[i + 1]
+            if len(body) >= i + 4 and all(ch in "01234567" for ch in body[i + 1:i + 4]):
+                out.append(int(body[i + 1:i + 4], 8))
+                i += 4
+                continue
+            out += _ESCAPES.get(n, n).encode("utf-8")
+            i += 2
+            continue
+        out += c.encode("utf-8")
+        i += 1
+    return out.decode("utf-8", errors="surrogateescape")
+
+def _strip_prefix(p: str) -> Optional[str]:
+    p = _unquote(p.split("\t", 1)[0].rstrip("\r") if not p.startswith('"') else p.rstrip("\r"))
+    if p == "/dev/null":
+        return None
+    if p.startswith(("a/", "b/")):
+        p = p[2:]
+    return p
+
+def _git_header_paths(rest: str) -> Tuple[Optional[str], Optional[str]]:
+    """'a/x b/y' (esetleg idézve) → (x, y); szóközös, idézetlen útvonalnál a felezés dönt."""
+    if rest.startswith('"'):
+        end = rest.find('"', 1)
+        while end != -1 and rest[end - 1] == "\\":
+            end = rest.find('"', end + 1)
+        if end != -1:
+            return _strip_prefix(rest[:end + 1]), _strip_prefix(rest[end + 1:].strip())
+    if rest.startswith("a/") and " b/" in rest:
+        # azonos hosszú a/ és b/ fele (módosításnál a két útvonal egyezik)
+        mid = len(rest) // 2
+        if rest[mid] == " " and rest[:mid][2:] == rest[mid + 3:]:
+            return rest[2:mid], rest[mid + 3:]
+        i = rest.rfind(" b/")
+        return rest[2:i], rest[i + 3:]
+    parts = rest.split(" ", 1)
+    return (_strip_prefix(parts[0]), _strip_prefix(parts[1])) if len(parts) == 2 else (None, None)
+
+def parse_unified_diff(text: str) -> DiffModel:
+    """Egy menet a sorokon; a hunkokat a fejléc old/new hossza szerint zárjuk le."""
+    model = DiffModel()
+    cur: Optional[FileDiff] = None
+    hunk: Optional[Hunk] = None
+    old_left = new_left = 0
+    git_file = False   # a cur "diff --git" fejlécből indult (---/+++ nem nyit új fájlt)
+    seen_minus = False
+
+    def _close_hunk() -> None:
+        nonlocal hunk
+        if hunk is not None and (old_left > 0 or new_left > 0):
+            model.errors.append(f"Csonka hunk: {cur.path if cur else '?'} @@ -{hunk.old_start} +{hunk.new_start}")
+        hunk = None
+
+    lines: Iterable[str] = text.split("\n")
+    if text.endswith("\n"):
+        lines = text[:-1].split("\n")
+    for ln in lines:
+        if hunk is not None:
+            tag = ln[:1] or " "  # üres sor: levágott szóközű kontextus
+            if tag == " " and old_left > 0 and new_left > 0:
+                hunk.lines.append(ln or " ")
+                old_left -= 1
+                new_left -= 1
+            elif tag == "-" and old_left > 0:
+                hunk.lines.append(ln)
+                hunk.removed += 1
+                old_left -= 1
+            elif tag == "+" and new_left > 0:
+                hunk.lines.append(ln)
+                hunk.added += 1
+                new_left -= 1
+            elif tag == "\\":
+                hunk.lines.append(ln)
+                continue
+            else:
+                _close_hunk()
+            if hunk is not None:
+                if old_left == 0 and new_left == 0:
+                    hunk = None
+                continue
+        elif ln.startswith("\\") and cur is not None and cur.hunks:
+            # "\ No newline at end of file" a hunk utolsó sora után
+            cur.hunks[-1].lines.append(ln)
+            continue
+
+        if ln.startswith("diff --git "):
+            cur = FileDiff(*_git_header_paths(ln[11:]))
+            model.files.append(cur)
+            git_file, seen_minus = True, False
+        elif ln.startswith("--- ") and (cur is None or not git_file or cur.hunks or seen_minus):
+            # sima unidiff: új fájl blokk
+            cur = FileDiff(_strip_prefix(ln[4:]), None)
+            model.files.append(cur)
+            git_file, seen_minus = False, True
+        elif ln.startswith("--- ") and cur is not None:
+            cur.old_path = _strip_prefix(ln[4:])
+            seen_minus = True
+        elif ln.startswith("+++ ") and cur is not None and not cur.hunks:
+            cur.new_path = _strip_prefix(ln[4:])
+        elif ln.startswith("@@ "):
+            m = _HUNK_RE.match(ln)
+            if cur is None or m is None:
+                model.errors.append(f"Értelmezhetetlen hunk fejléc: {ln[:80]}")
+                continue
+            o_len = int(m.group(2)) if m.group(2) is not None else 1
+            n_len = int(m.group(4)) if m.group(4) is not None else 1
+            hunk = Hunk(int(m.group(1)), o_len, int(m.group(3)), n_len, m.group(5).strip())
+            cur.hunks.append(hunk)
+            old_left, new_left = o_len, n_len
+            if old_left == 0 and new_left == 0:
+                hunk = None
+        elif cur is not None:
+            if ln.startswith("new file mode "):
+                cur.is_new, cur.new_mode, cur.old_path = True, ln[14:].strip(), None
+            elif ln.startswith("deleted file mode "):
+                cur.is_deleted, cur.old_mode, cur.new_path = True, ln[18:].strip(), None
+            elif ln.startswith("old mode "):
+                cur.old_mode = ln[9:].strip()
+            elif ln.startswith("new mode "):
+                cur.new_mode = ln[9:].strip()
+            elif ln.startswith("rename from "):
+                cur.is_rename, cur.old_path = True, _unquote(ln[12:])
+            elif ln.startswith("rename to "):
+                cur.is_rename, cur.new_path = True, _unquote(ln[10:])
+            elif ln.startswith("copy from "):
+                cur.is_copy, cur.old_path = True, _unquote(ln[10:])
+            elif ln.startswith("copy to "):
+                cur.is_copy, cur.new_path = True, _unquote(ln[8:])
+            elif ln.startswith(("Binary files ", "GIT binary patch")):
+                cur.is_binary = True
+    _close_hunk()
+    for f in model.files:
+        f.added = sum(h.added for h in f.hunks)
+        f.removed = sum(h.removed for h in f.hunks)
+        if f.old_path is None and not f.is_new and f.new_path is not None and f.hunks and f.hunks[0].old_len == 0:
+            f.is_new = True
+        if f.new_path is None and not f.is_deleted and f.old_path is not None:
+            f.is_deleted = True
+    return model
+
+def normalize_path(p: str) -> str:
+    """Összehasonlítási alak: '/' elválasztó, './' és '..' feloldva, vezető '/' nélkül."""
+    p = p.replace("\\", "/")
+    norm = posixpath.normpath(p) if p else p
+    return norm.lstrip("/") if norm != "." else ""
+
+def deny_hits(paths: Iterable[str], prefixes: Iterable[str]) -> List[Tuple[str, str]]:
+    """(útvonal, prefix) párok, ahol a normalizált útvonal a tiltott mappában van
+    (kis-/nagybetű-független, mert a célrendszer lehet Windows). ANY_DEPTH_DIRS-beli
+    prefix (.git/) bármely útvonal-szegmensre illeszt, nem csak a gyökérre."""
+    prefs = [(p, p.rstrip("/").casefold()) for p in prefixes]
+    hits: List[Tuple[str, str]] = []
+    for path in paths:
+        norm = normalize_path(path).casefold()
+        segs = norm.split("/")
+        for pref, bare in prefs:
+            if norm == bare or norm.startswith(bare + "/") or (bare in ANY_DEPTH_DIRS and bare in segs):
+                hits.append((path, pref))
+    return hits
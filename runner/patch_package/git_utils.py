@@ -1,37 +1,176 @@
 from __future__ import annotations
-import subprocess, shlex, os
-from typing import Tuple
+import subprocess, os, re, threading, time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Union
 
-def run_cmd(cmd: str) -> Tuple[int, str, str]:
-    p = subprocess.Popen(cmd, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-    out, err = p.communicate()
-    return p.returncode, out, err
+# Ennyi ideig (mp) használható újra egy git status eredmény, ha közben az index nem változott.
+# Csak tájékoztató lekérdezéshez: a working tree szerkesztése az indexet nem érinti, ezért a
+# "tiszta-e" kapu mindig friss statust kér (max_age=0)
+STATUS_MAX_AGE_S = 2.0
+
+_OID_RE = re.compile(r"^[0-9a-f]{40}([0-9a-f]{24})?$")  # SHA-1 / SHA-256 objektum-azonosító
+
+_NO_WINDOW = getattr(subprocess, "CREATE_NO_WINDOW", 0)  # Windows: ne villanjon konzol
 
-def working_tree_clean() -> bool:
-    code, out, err = run_cmd("git status --porcelain")
-    if code != 0:
-        # Ha nincs repo, ez is "nem tiszta" jelzés
-        return False
-    return out.strip() == ""
-
-def commit_exists(sha: str) -> bool:
-    code, out, err = run_cmd(f"git cat-file -t {shlex.quote(sha)}")
-    return code == 0 and out.strip() in {"commit", "tag"}  # tag is elfogadható mint mutató
-
-def apply_check(diff_text: str) -> Tuple[bool, str]:
-    # Írjuk ideiglenes fájlba a diffet és futtassuk a git apply --check parancsot.
-    # Step 2-ben nem kötelező futtatni; a megvalósítás a későbbi használathoz kell.
-    import tempfile
-    with tempfile.NamedTemporaryFile("w", encoding="utf-8", delete=False) as tf:
-        tf.write(diff_text)
-        temp_name = tf.name
+def run_cmd(cmd: Union[str, Sequence[str]], cwd: Optional[str] = None, input: Optional[str] = None) -> Tuple[int, str, str]:
+    """Parancs futtatása. Listát shell nélkül indít (nincs shell-indítási költség és idézési gond);
+    sztringet a korábbi módon, shell=True-val."""
     try:
-        code, out, err = run_cmd(f"git apply --check {temp_name}")
-        ok = (code == 0)
-        msg = out if ok else err
-        return ok, msg
-    finally:
+        p = subprocess.Popen(cmd, shell=isinstance(cmd, str), cwd=cwd,
+                             stdin=subprocess.PIPE if input is not None else None,
+                             stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                             text=True, encoding="utf-8", errors="replace", creationflags=_NO_WINDOW)
+    except OSError as e:
+        # Nincs git / érvénytelen cwd: mint a shell "command not found" esete
+        return 127, "", str(e)
+    out, err = p.communicate(input)
+    return p.returncode, out, err
+
+def _key(cwd: Optional[str]) -> str:
+    return os.path.abspath(cwd or os.getcwd())
+
+class CatFile:
+    """Tartós `git cat-file --batch-check` csatorna: egy folyamat szolgál ki minden
+    objektum-lekérdezést (szálbiztos; ha a folyamat kilép, a következő kérés újraindítja)."""
+
+    def __init__(self, cwd: Optional[str] = None) -> None:
+        self.cwd = _key(cwd)
+        self._lock = threading.Lock()
+        self._proc: Optional[subprocess.Popen] = None
+        self._known: Dict[str, str] = {}  # teljes SHA → típus (létező objektum nem tűnik el)
+
+    def _start(self) -> Optional[subprocess.Popen]:
+        """A futó csatorna; None, ha a git nem indítható (nincs telepítve / érvénytelen cwd)."""
+        if self._proc is None or self._proc.poll() is not None:
+            try:
+                self._proc = subprocess.Popen(["git", "cat-file", "--batch-check"], cwd=self.cwd,
+                                              stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                              stderr=subprocess.DEVNULL, creationflags=_NO_WINDOW)
+            except OSError:
+                self._proc = None
+        return self._proc
+
+    def object_type(self, rev: str) -> Optional[str]:
+        """Objektum típusa (commit/tree/blob/tag), vagy None, ha nincs ilyen / hiba."""
+        # A batch-check soronként egy revet olvas, és a válaszban visszhangozza: szóközös rev
+        # ("x commit" → "x commit missing") összekeverné a mezőket, ezért eleve elutasítjuk
+        if not rev or "\0" in rev or any(c.isspace() for c in rev):
+            return None
+        if rev in self._known:
+            return self._known[rev]
+        with self._lock:
+            for _ in range(2):  # egy újrapróbálás, ha a csatorna közben lezárult
+                proc = self._start()
+                if proc is None:
+                    return None
+                try:
+                    proc.stdin.write(rev.encode("utf-8") + b"\n")
+                    proc.stdin.flush()
+                    line = proc.stdout.readline().decode("utf-8", errors="replace").split()
+                except (OSError, ValueError):
+                    self._close()
+                    continue
+                if not line:
+                    self._close()
+                    continue
+                # "<sha> <típus> <méret>" vagy "<rev> missing" / "<rev> ambiguous"
+                if line[-1] in ("missing", "ambiguous") or len(line) != 3 or not _OID_RE.match(line[0]):
+                    return None
+                if line[0] == rev.lower():
+                    self._known[rev] = line[1]
+                return line[1]
+        return None
+
+    def _close(self) -> None:
+        proc, self._proc = self._proc, None
+        if proc is None:
+            return
         try:
-            os.remove(temp_name)
-        except Exception:
-            pass
+            proc.stdin.close()
+            proc.wait(timeout=2)
+        except (OSError, ValueError, subprocess.TimeoutExpired):
+            proc.kill()
+        finally:
+            proc.stdout.close()
+
+    def close(self) -> None:
+        with self._lock:
+            self._close()
+
+class _StatusCache:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._cache: Dict[str, Tuple[float, Optional[int], Optional[List[str]]]] = {}
+
+    def query(self, cwd: Optional[str], max_age: float) -> Optional[List[str]]:
+        key = _key(cwd)
+        stamp = _index_stamp(key)
+        with self._lock:
+            hit = self._cache.get(key)
+            # Ismeretlen index-bélyeg (worktree, alkönyvtár cwd) esetén nincs újrahasznosítás
+            if (hit is not None and stamp is not None and hit[1] == stamp
+                    and time.monotonic() - hit[0] <= max_age):
+                return hit[2]
+        code, out, _ = run_cmd(["git", "status", "--porcelain", "-z"], cwd=key)
+        entries = [e for e in out.split("\0") if e] if code == 0 else None
+        with self._lock:
+            self._cache[key] = (time.monotonic(), _index_stamp(key), entries)
+        return entries
+
+    def invalidate(self, cwd: Optional[str] = None) -> None:
+        with self._lock:
+            if cwd is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(_key(cwd), None)
+
+def _index_stamp(cwd: str) -> Optional[int]:
+    try:
+        return Path(cwd, ".git", "index").stat().st_mtime_ns
+    except OSError:
+        return None
+
+_channels: Dict[str, CatFile] = {}
+_channels_lock = threading.Lock()
+_status = _StatusCache()
+
+def cat_file(cwd: Optional[str] = None) -> CatFile:
+    """A repóhoz tartozó (megosztott) batch-check csatorna."""
+    key = _key(cwd)
+    with _channels_lock:
+        ch = _channels.get(key)
+        if ch is None:
+            ch = _channels[key] = CatFile(key)
+        return ch
+
+def close_all() -> None:
+    with _channels_lock:
+        chans = list(_channels.values())
+        _channels.clear()
+    for ch in chans:
+        ch.close()
+
+def status_entries(cwd: Optional[str] = None, max_age: float = 0.0) -> Optional[List[str]]:
+    """`git status --porcelain -z` bejegyzései (None: nem git repo / hiba). max_age mp-en
+    belül, változatlan index mellett a legutóbbi eredmény újrahasznosul."""
+    return _status.query(cwd, max_age)
+
+def invalidate_status(cwd: Optional[str] = None) -> None:
+    """Saját írás után hívandó, hogy a következő status friss legyen."""
+    _status.invalidate(cwd)
+
+def working_tree_clean(cwd: Optional[str] = None, max_age: float = 0.0) -> bool:
+    entries = status_entries(cwd, max_age)
+    # Ha nincs repo, ez is "nem tiszta" jelzés
+    return entries is not None and not entries
+
+def commit_exists(sha: str, cwd: Optional[str] = None) -> bool:
+    # tag is elfogadható mint mutató
+    return cat_file(cwd).object_type(sha) in {"commit", "tag"}
+
+def apply_check(diff_text: str, cwd: Optional[str] = None) -> Tuple[bool, str]:
+    # Referencia-ellenőrzés valódi gittel (a preflight a memóriabeli overlay.dry_run-t használja);
+    # a diff stdin-en megy (nincs ideiglenes fájl, nincs shell)
+    code, out, err = run_cmd(["git", "apply", "--check", "-"], cwd=cwd, input=diff_text)
+    ok = (code == 0)
+    return ok, out if ok else err
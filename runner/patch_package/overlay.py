@@ -0,0 +1,308 @@
+"""Memóriabeli dry-run alkalmazás: unified diff és new_files[] egy virtuális rétegen
+(overlay) a working tree fölött, subprocess és ideiglenes fájl nélkül.
+
+- Csak az érintett fájlok olvasódnak be (lustán, egyszer); a lemez nem változik
+- Hunkonként pontos kontextus-egyezés, a deklarált helytől legközelebbi eltolással
+  (mint a git apply, fuzz nélkül); ütközésnél a hunk sorszáma és a várt sor jelentve
+- Az eredmény overlay (változott útvonal → új tartalom / None = törlés) a kapuk
+  előkészítésének és az apply motornak az alapja; a csak módváltó (old/new mode,
+  hunk nélküli) diff is változásnak számít, ha a végrehajthatóság ténylegesen eltér
+  (POSIX; Windowson a mód nem értelmezett, mint a core.fileMode=false gitnél)
+"""
+from __future__ import annotations
+import os, stat, unicodedata
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+from .diff_model import DiffModel, FileDiff, Hunk, normalize_path, parse_unified_diff
+
+# new_files[].mode: "create" (nem létezhet), "overwrite" (létezhet); git-féle oktális
+# mód (pl. "100644", "100755") create-ként értendő, a végrehajthatóság megjegyezve
+CREATE_MODES = {"create", "new", "add"}
+OVERWRITE_MODES = {"overwrite", "replace", "upsert"}
+
+class OverlayError(Exception):
+    """Érvénytelen / fához nem illeszthető útvonal."""
+
+def safe_rel(path: str) -> str:
+    """Repó-relatív, '/' elválasztós alak; abszolút vagy a gyökérből kilépő útvonalnál hiba."""
+    p = path.replace("\\", "/")
+    if not p or p.startswith("/") or (len(p) > 1 and p[1] == ":"):
+        raise OverlayError(f"abszolút vagy üres útvonal: {path}")
+    rel = normalize_path(unicodedata.normalize("NFC", p))
+    if not rel or rel == ".." or rel.startswith("../"):
+        raise OverlayError(f"a gyökéren kívülre mutat: {path}")
+    return rel
+
+class Overlay:
+    """Virtuális réteg a working tree fölött. A lemezről olvasott eredeti tartalom
+    (originals) megmarad: ebből számolható a változáslista és a visszaállítás."""
+
+    def __init__(self, root: Union[str, Path, None] = None) -> None:
+        self.root = Path(root or os.getcwd())
+        self.originals: Dict[str, Optional[bytes]] = {}   # lemez állapota (None: nem létezett)
+        self._files: Dict[str, Optional[bytes]] = {}      # réteg (None: törölve)
+        self.modes: Dict[str, str] = {}                   # új/változott mód (pl. "100755")
+
+    def _disk(self, rel: str) -> Optional[bytes]:
+        if rel not in self.originals:
+            try:
+                self.originals[rel] = (self.root / rel).read_bytes()
+            except FileNotFoundError:
+                self.originals[rel] = None
+            except IsADirectoryError:
+                raise OverlayError(f"könyvtár, nem fájl: {rel}")
+            except OSError as e:
+                # pl. Windowson könyvtárnál PermissionError, "fájl/gyerek" útvonalnál NotADirectoryError
+                raise OverlayError(f"nem olvasható: {rel} ({e.strerror or e})")
+        return self.originals[rel]
+
+    def read(self, path: str) -> Optional[bytes]:
+        rel = safe_rel(path)
+        if rel in self._files:
+            return self._files[rel]
+        return self._disk(rel)
+
+    def exists(self, path: str) -> bool:
+        return self.read(path) is not None
+
+    def write(self, path: str, data: bytes) -> None:
+        rel = safe_rel(path)
+        self._disk(rel)
+        self._files[rel] = data
+
+    def delete(self, path: str) -> None:
+        rel = safe_rel(path)
+        self._disk(rel)
+        self._files[rel] = None
+        self.modes.pop(rel, None)
+
+    def mode_changes(self) -> Dict[str, str]:
+        """Meglévő, megmaradó fájlok, amelyek végrehajthatósága a kért git módtól eltér."""
+        out: Dict[str, str] = {}
+        if os.name != "posix":
+            return out
+        for rel, mode in self.modes.items():
+            if not mode.isdigit() or self._files.get(rel) is None or self.originals.get(rel) is None:
+                continue
+            try:
+                executable = bool(stat.S_IMODE((self.root / rel).stat().st_mode) & 0o111)
+            except OSError:
+                continue
+            if executable != mode.endswith("755"):
+                out[rel] = mode
+        return out
+
+    def changes(self) -> Dict[str, Optional[bytes]]:
+        """Ténylegesen változott útvonalak (a lemezhez képest) → új tartalom / None.
+        Módváltásnál a tartalom változatlan, az útvonal mégis szerepel (ld. mode_changes)."""
+        moded = self.mode_changes()
+        return {rel: data for rel, data in self._files.items()
+                if data != self.originals.get(rel) or rel in moded}
+
+@dataclass
+class HunkReport:
+    path: str
+    index: int                  # 1-től számolt hunk-sorszám a fájlon belül
+    old_start: int
+    applied_at: Optional[int]   # tényleges kezdősor (1-től), ütközésnél None
+    offset: int = 0             # applied_at - deklarált kezdősor
+    conflict: Optional[str] = None
+
+@dataclass
+class DryRun:
+    overlay: Overlay
+    hunks: List[HunkReport] = field(default_factory=list)
+    errors: List[str] = field(default_factory=list)     # fájlszintű hibák és ütközések
+    files: List[str] = field(default_factory=list)      # érintett útvonalak sorrendben
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+    def conflicts(self) -> List[HunkReport]:
+        return [h for h in self.hunks if h.conflict]
+
+def _split(data: bytes) -> Tuple[List[bytes], bool]:
+    """Sorok sortörés nélkül + van-e záró sortörés (a CR a sor része marad, mint a gitben)."""
+    if not data:
+        return [], True
+    lines = data.split(b"\n")
+    if lines[-1] == b"":
+        lines.pop()
+        return lines, True
+    return lines, False
+
+def _join(lines: List[bytes], eol: bool) -> bytes:
+    if not lines:
+        return b""
+    return b"\n".join(lines) + (b"\n" if eol else b"")
+
+def _hunk_sides(h: Hunk) -> Tuple[List[bytes], List[bytes], bool, bool, int]:
+    """(régi sorok, új sorok, régi no-eol, új no-eol, záró kontextus-sorok száma)."""
+    old: List[bytes] = []
+    new: List[bytes] = []
+    old_noeol = new_noeol = False
+    last = ""
+    trailing = 0
+    for ln in h.lines:
+        tag = ln[:1]
+        if tag == "\\":
+            if last in (" ", "-"):
+                old_noeol = True
+            if last in (" ", "+"):
+                new_noeol = True
+            continue
+        body = ln[1:].encode("utf-8", "surrogateescape")
+        if tag != "+":
+            old.append(body)
+        if tag != "-":
+            new.append(body)
+        trailing = trailing + 1 if tag == " " else 0
+        last = tag
+    return old, new, old_noeol, new_noeol, trailing
+
+def _find(lines: List[bytes], old: List[bytes], expected: int, lo: int,
+          at_begin: bool = False, at_end: bool = False) -> Optional[int]:
+    """old kezdőindexe lines-ban: a várthoz legközelebbi pontos egyezés, lo-nál nem korábban.
+    at_begin / at_end: a hunk a fájl elejéhez / végéhez horgonyzott (mint a git apply-nál)."""
+    hi = len(lines) - len(old)
+    if hi < lo:
+        return None
+    if at_begin or at_end:
+        p = 0 if at_begin else hi
+        ok = lo <= p and (not at_end or p == hi) and lines[p:p + len(old)] == old
+        return p if ok else None
+    if not old:
+        return expected if lo <= expected <= len(lines) else None
+    first = old[0]
+    expected = min(max(expected, lo), hi)
+    for d in range(0, max(expected - lo, hi - expected) + 1):
+        for p in ((expected + d, expected - d) if d else (expected,)):
+            if lo <= p <= hi and lines[p] == first and lines[p:p + len(old)] == old:
+                return p
+    return None
+
+def _apply_hunks(path: str, data: bytes, hunks: List[Hunk], reports: List[HunkReport]) -> Optional[bytes]:
+    """Hunkok egy fájl tartalmára; ütközésnél None (a többi hunk ekkor is kiértékelődik)."""
+    lines, eol = _split(data)
+    out: List[bytes] = []
+    src = 0          # lines-ban eddig feldolgozott rész vége
+    drift = 0        # az eddigi eltolás (a következő hunk várt helyéhez)
+    new_eol = eol
+    failed = False
+    for i, h in enumerate(hunks, 1):
+        old, new, old_noeol, new_noeol, trailing = _hunk_sides(h)
+        declared = h.old_start - 1 if h.old_len else h.old_start
+        # git apply szabálya: az 1. sortól induló hunk a fájl elejére, a záró kontextus
+        # nélküli a fájl végére illeszkedhet csak
+        p = _find(lines, old, declared + drift, src, at_begin=h.old_start <= 1, at_end=trailing == 0)
+        rep = HunkReport(path, i, h.old_start, None)
+        reports.append(rep)
+        if p is not None:
+            at_end = p + len(old) == len(lines)
+            # Záró sortörés: a hunk a fájl végén csak akkor illeszkedik, ha a "\ No newline" jelzés egyezik
+            if old and at_end and old_noeol == eol:
+                p = None
+            elif old_noeol and not at_end:
+                p = None
+        if p is None:
+            rep.conflict = f"a kontextus nem egyezik (várt sor: {declared + drift + 1})"
+            failed = True
+            continue
+        rep.applied_at, rep.offset = p + 1, p - declared
+        drift = p - declared
+        out.extend(lines[src:p])
+        out.extend(new)
+        src = p + len(old)
+        if src == len(lines):
+            new_eol = not new_noeol
+    if failed:
+        return None
+    out.extend(lines[src:])
+    return _join(out, new_eol)
+
+def _apply_file(ov: Overlay, fd: FileDiff, res: DryRun) -> None:
+    path = fd.path
+    if fd.is_binary:
+        res.errors.append(f"{path}: bináris patch nem támogatott")
+        return
+    src_path = fd.old_path if (fd.is_rename or fd.is_copy) else path
+    try:
+        data = None if fd.is_new else ov.read(src_path)
+        if fd.is_new and ov.exists(path):
+            res.errors.append(f"{path}: már létezik (új fájlként hozná létre a diff)")
+            return
+        if not fd.is_new and data is None:
+            res.errors.append(f"{src_path}: nem létezik")
+            return
+        if (fd.is_rename or fd.is_copy) and fd.new_path != fd.old_path and ov.exists(fd.new_path):
+            res.errors.append(f"{fd.new_path}: a cél már létezik")
+            return
+        n_before = len(res.hunks)
+        result = _apply_hunks(path, data or b"", fd.hunks, res.hunks)
+        if result is None:
+            for rep in res.hunks[n_before:]:
+                if rep.conflict:
+                    res.errors.append(f"{path}: {rep.index}. hunk (@@ -{rep.old_start}) ütközik: {rep.conflict}")
+            return
+        if fd.is_deleted:
+            if result:
+                res.errors.append(f"{path}: a törlendő fájl tartalma eltér")
+                return
+            ov.delete(path)
+        else:
+            ov.write(fd.new_path, result)
+            if fd.is_rename and fd.old_path != fd.new_path:
+                ov.delete(fd.old_path)
+            if fd.new_mode:
+                ov.modes[safe_rel(fd.new_path)] = fd.new_mode
+    except OverlayError as e:
+        res.errors.append(f"{path}: {e}")
+        return
+    res.files.append(path)
+
+def apply_diff(ov: Overlay, diff: Union[str, DiffModel], res: Optional[DryRun] = None) -> DryRun:
+    res = res or DryRun(ov)
+    model = parse_unified_diff(diff) if isinstance(diff, str) else diff
+    res.errors.extend(f"Hibás diff: {e}" for e in model.errors)
+    for fd in model.files:
+        _apply_file(ov, fd, res)
+    return res
+
+def apply_new_files(ov: Overlay, items: Iterable[Dict[str, Any]], res: Optional[DryRun] = None) -> DryRun:
+    res = res or DryRun(ov)
+    for i, it in enumerate(items):
+        path, mode, content = it.get("path"), it.get("mode"), it.get("content")
+        if not isinstance(path, str) or not isinstance(content, str):
+            res.errors.append(f"new_files[{i}]: path/content hiányzik")
+            continue
+        mode = (mode or "create").strip().lower() if isinstance(mode, str) else "create"
+        octal = mode.isdigit()
+        if not octal and mode not in CREATE_MODES | OVERWRITE_MODES:
+            res.errors.append(f"new_files[{i}] {path}: ismeretlen mode: {mode}")
+            continue
+        try:
+            if mode not in OVERWRITE_MODES and ov.exists(path):
+                res.errors.append(f"new_files[{i}] {path}: már létezik")
+                continue
+            ov.write(path, content.encode("utf-8", "surrogatepass"))
+            if octal:
+                ov.modes[safe_rel(path)] = mode
+        except OverlayError as e:
+            res.errors.append(f"new_files[{i}] {path}: {e}")
+            continue
+        res.files.append(path)
+    return res
+
+def dry_run(doc: Dict[str, Any], root: Union[str, Path, None] = None,
+            model: Optional[DiffModel] = None) -> DryRun:
+    """A csomag (diff_unified és/vagy new_files[]) alkalmazása egy friss overlay-re."""
+    res = DryRun(Overlay(root))
+    diff = doc.get("diff_unified")
+    if isinstance(diff, str):
+        apply_diff(res.overlay, model or diff, res)
+    nf = doc.get("new_files")
+    if isinstance(nf, list):
+        apply_new_files(res.overlay, [it for it in nf if isinstance(it, dict)], res)
+    return res
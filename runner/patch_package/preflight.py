@@ -1,8 +1,11 @@
 from __future__ import annotations
-import os, re, math
-from typing import Any, Dict, Set
+import os, re, math, threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Optional, Set
 from .result import Result, EXIT_PRE
-from .git_utils import working_tree_clean, commit_exists, apply_check
+from .git_utils import working_tree_clean, commit_exists
+from .diff_model import DiffModel, parse_unified_diff, deny_hits
+from .overlay import dry_run
 
 # Limitek
 SOFT_FILES = 3
@@ -12,6 +15,13 @@ HARD_LINES = 200
 SOFT_BYTES = 200 * 1024  # 200 kB
 HARD_FILE_BYTES = 2 * 1024 * 1024  # 2 MB per new file
 HARD_TOTAL_BYTES = 5 * 1024 * 1024  # 5 MB total for new files
+# Nyers csomag felső korlátja: a dekódolt limitből a legrosszabb JSON-escape szorzóval
+# (vezérlőkarakter: 1 UTF-8 bájt → "\u001f" = 6 bájt; asztrális: 4 → 12 bájt surrogate párként)
+# + tartalék a dokumentum többi részére. A valódi kapu a dekódolt méret; a streaming
+# validator ennél többet be sem olvas
+JSON_ESCAPE_FACTOR = 6
+PAYLOAD_MARGIN_BYTES = 1024 * 1024
+HARD_PAYLOAD_BYTES = JSON_ESCAPE_FACTOR * HARD_TOTAL_BYTES + PAYLOAD_MARGIN_BYTES
 
 # Denylist
 DENY_PREFIXES = (".git/", "0_SYSTEM/", "dist/", "runner/", "sandbox/", "gui/")
@@ -19,37 +29,93 @@ DENY_PREFIXES = (".git/", "0_SYSTEM/", "dist/", "runner/", "sandbox/", "gui/")
 _seen_hashes: Set[str] = set()
 
 def _calc_scope_from_diff(diff_text: str) -> (int, int):
-    files = 0
-    lines = 0
     if not isinstance(diff_text, str):
-        return files, lines
-    for line in diff_text.splitlines():
-        if line.startswith("diff --git "):
-            files += 1
-        elif line.startswith(("+", "-")) and not line.startswith(("+++", "---")):
-            lines += 1
-    return files, lines
-
-def preflight(doc: Dict[str, Any]) -> Result:
-    res = Result(ok=True, exit_code=0, errors=[], evidence=[])
-
-    # Working tree tiszta?
-    if not working_tree_clean():
-        res.add_error("A working tree nem tiszta. Előbb mentsd vagy vondd vissza a helyi változtatásokat.")
+        return 0, 0
+    model = parse_unified_diff(diff_text)
+    return len(model.files), model.lines
+
+_pool: Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+def _get_pool() -> ThreadPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=3, thread_name_prefix="preflight")
+        return _pool
+
+def _check_clean(cwd: Optional[str]) -> Result:
+    r = Result(ok=True)
+    # Mindig friss status: ez biztonsági kapu, gyorsítótárazott eredmény nem elég
+    if not working_tree_clean(cwd):
+        r.add_error("A working tree nem tiszta. Előbb mentsd vagy vondd vissza a helyi változtatásokat.")
     else:
-        res.add_evidence("Working tree tiszta.")
+        r.add_evidence("Working tree tiszta.")
+    return r
 
-    # base_commit létezik?
-    base = doc.get("base_commit_sha")
-    if not isinstance(base, str) or not commit_exists(base):
-        res.add_error("A megadott base_commit_sha nem található a lokális gitben.")
+def _check_base(base: Any, cwd: Optional[str]) -> Result:
+    r = Result(ok=True)
+    if not isinstance(base, str) or not commit_exists(base, cwd):
+        r.add_error("A megadott base_commit_sha nem található a lokális gitben.")
     else:
-        res.add_evidence(f"base_commit_sha OK: {base}")
+        r.add_evidence(f"base_commit_sha OK: {base}")
+    return r
+
+def _check_apply(doc: Dict[str, Any], model: Optional[DiffModel], cwd: Optional[str]) -> Result:
+    # Memóriabeli dry-run (git apply --check helyett): csak az érintett fájlok olvasódnak
+    r = Result(ok=True)
+    dr = dry_run(doc, cwd, model)
+    for err in dr.errors:
+        r.add_error(f"Dry-run apply hiba: {err}")
+    if r.ok:
+        shifted = [h for h in dr.hunks if h.offset]
+        moded = dr.overlay.mode_changes()
+        r.add_evidence(f"Dry-run apply OK: {len(dr.files)} fájl, {len(dr.hunks)} hunk"
+                       + (f", {len(moded)} módváltás" if moded else "")
+                       + (f", {len(shifted)} eltolással." if shifted else "."))
+        for rel, mode in moded.items():
+            r.add_evidence(f"{rel}: mód → {mode}.")
+        for h in shifted:
+            r.add_evidence(f"{h.path}: {h.index}. hunk eltolva {h.offset:+d} sorral (@@ -{h.old_start} → {h.applied_at}).")
+    return r
+
+def _run_git_checks(checks: Dict[str, Callable[[], Result]]) -> Dict[str, Optional[Result]]:
+    """Független git-ellenőrzések párhuzamosan; az első hard hibánál a többi eredményére
+    nem várunk (a még el nem indultak törlődnek). Kihagyott ellenőrzés: None."""
+    pool = _get_pool()
+    futures: Dict[Future, str] = {pool.submit(fn): name for name, fn in checks.items()}
+    out: Dict[str, Optional[Result]] = {name: None for name in checks}
+    pending = set(futures)
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        failed = False
+        for fut in done:
+            try:
+                r = fut.result()
+            except Exception as e:  # váratlan hiba se döntse el a PRE kaput
+                r = Result(ok=True)
+                r.add_error(f"Git-ellenőrzés ({futures[fut]}) hibával leállt: {e}")
+            out[futures[fut]] = r
+            failed = failed or not r.ok
+        if failed:
+            for fut in pending:
+                fut.cancel()
+            break
+    return out
+
+def preflight(doc: Dict[str, Any], cwd: Optional[str] = None) -> Result:
+    """PRE kapu. Előbb az olcsó, helyi ellenőrzések (méret, scope, limitek, denylist,
+    duplikáció); ha ezek hard hibát adnak, git nem fut. Utána a git-ellenőrzések
+    (tiszta working tree, base commit, memóriabeli dry-run apply) párhuzamosan, rövidzárral.
+    Az üzenetek sorrendje a futási sorrendtől függetlenül rögzített."""
+    res = Result(ok=True, exit_code=0, errors=[], evidence=[])
 
     # Csomagméret (raw payload hossz) – ha rendelkezésre áll
     raw_len = doc.get("_raw_len")
     if isinstance(raw_len, int):
-        if raw_len > SOFT_BYTES:
+        if raw_len > HARD_PAYLOAD_BYTES:
+            res.add_error(f"A csomag nyers mérete meghaladja a {HARD_PAYLOAD_BYTES} bájtot.")
+        elif raw_len > SOFT_BYTES:
             res.add_evidence(f"Oversize csomag (raw_len={raw_len} byte) – lassú sáv javasolt.")
     else:
         res.add_evidence("Nem áll rendelkezésre nyers csomaghossz.")
@@ -59,9 +125,16 @@ def preflight(doc: Dict[str, Any]) -> Result:
     lines_decl = int(doc.get("scope_size", {}).get("lines", 0) or 0)
     files_calc = lines_calc = None
 
+    # A diff egyszer parszolódik; scope, limitek és denylist ugyanebből a modellből
+    model: DiffModel | None = None
     if "diff_unified" in doc and isinstance(doc["diff_unified"], str):
-        files_calc, lines_calc = _calc_scope_from_diff(doc["diff_unified"])
-        res.add_evidence(f"Diff alapján becsült scope: files={files_calc}, lines={lines_calc}")
+        model = parse_unified_diff(doc["diff_unified"])
+        files_calc, lines_calc = len(model.files), model.lines
+        res.add_evidence(f"Diff alapján számolt scope: files={files_calc}, lines={lines_calc} (+{model.added}/-{model.removed})")
+        for err in model.errors:
+            res.add_error(f"Hibás diff: {err}")
+        if not model.files and doc["diff_unified"].strip():
+            res.add_error("A diff_unified nem tartalmaz értelmezhető fájlblokkot.")
 
     # Soft/hard limitek
     def _check_limits(files, lines):
@@ -81,13 +154,14 @@ def preflight(doc: Dict[str, Any]) -> Result:
     elif nf_total > 0:
         res.add_evidence(f"Új fájlok összmérete: {nf_total} bájt.")
 
-    # Denylist érintésének detektálása (heurisztika diffből is)
-    for key in ("diff_unified",):
-        if key in doc and isinstance(doc[key], str):
-            diff = doc[key]
-            for prefix in DENY_PREFIXES:
-                if f"/{prefix}" in diff or diff.startswith(prefix):
-                    res.add_error(f"Denylist érintett a diffben: {prefix}")
+    # Denylist: pontos prefix-egyezés a valódi cél-útvonalakon (rename/copy forrás is),
+    # a tartalmi sorok nem számítanak
+    if model is not None:
+        for prefix in dict.fromkeys(p for _, p in deny_hits(model.paths(), DENY_PREFIXES)):
+            res.add_error(f"Denylist érintett a diffben: {prefix}")
+    nf_paths = [it["path"] for it in doc.get("new_files") or [] if isinstance(it, dict) and isinstance(it.get("path"), str)]
+    for prefix in dict.fromkeys(p for _, p in deny_hits(nf_paths, DENY_PREFIXES)):
+        res.add_error(f"Denylist érintett az új fájlokban: {prefix}")
 
     # Duplikáció védelem – doc['_payload_sha256'] jelenléte esetén
     payload_hash = doc.get("_payload_sha256")
@@ -98,13 +172,28 @@ def preflight(doc: Dict[str, Any]) -> Result:
             _seen_hashes.add(payload_hash)
             res.add_evidence("Payload hash regisztrálva ezen futásra.")
 
-    # git apply --check (ha van diff)
-    if isinstance(doc.get("diff_unified"), str):
-        ok, msg = apply_check(doc["diff_unified"])
-        if not ok:
-            res.add_error(f"git apply --check hiba: {msg.strip()}")
-        else:
-            res.add_evidence("git apply --check OK.")
+    # Git-ellenőrzések (a helyi hibáknál kihagyva)
+    checks: Dict[str, Callable[[], Result]] = {
+        "clean": lambda: _check_clean(cwd),
+        "base": lambda: _check_base(doc.get("base_commit_sha"), cwd),
+    }
+    if isinstance(doc.get("diff_unified"), str) or isinstance(doc.get("new_files"), list):
+        checks["apply"] = lambda: _check_apply(doc, model, cwd)
+    if res.ok:
+        git_res = _run_git_checks(checks)
+    else:
+        git_res = dict.fromkeys(checks)
+
+    final = Result(ok=True, exit_code=0, errors=[], evidence=[])
+    skipped = [name for name, r in git_res.items() if r is None]
+    for part in (git_res["clean"], git_res["base"], res, git_res.get("apply")):
+        if part is not None:
+            final.errors.extend(part.errors)
+            final.evidence.extend(part.evidence)
+            final.ok = final.ok and part.ok
+    if skipped:
+        final.add_evidence(f"Git-ellenőrzések kihagyva korábbi hard hiba miatt: {', '.join(skipped)}.")
+    res = final
 
     # Végső exit code beállítása
     if not res.ok:
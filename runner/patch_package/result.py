@@ -4,6 +4,7 @@ from typing import List
 
 # Exit kódok (részleges; Step 2-ben a PRE kapu lényeges)
 EXIT_PRE = 39
+EXIT_APPLY = 41  # 40: lint/compile kapu (gates)
 
 @dataclass
 class Result:
@@ -1,12 +1,27 @@
 from __future__ import annotations
 import json, re, unicodedata
-from typing import Any, Dict, List
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple, Union
 from .result import Result, EXIT_PRE
 from .schema import REQUIRED_TOP_LEVEL_KEYS, OPTIONAL_TOP_LEVEL_KEYS, XOR_FIELDS, ALLOWED_EXTRA_KEYS
+from .preflight import HARD_FILE_BYTES, HARD_TOTAL_BYTES, HARD_PAYLOAD_BYTES
 
 HEX40 = re.compile(r"^[0-9a-fA-F]{40}$")
 WINDOWS_FORBIDDEN = set('<>:"/\\|?*')
 
+# Streaming olvasás blokkmérete, ill. UTF-8 hossz számolásakor egy darab (karakter)
+READ_CHUNK = 64 * 1024
+_UTF8_CHUNK = 64 * 1024
+
+class _TooLarge(Exception):
+    """Korai elutasítás: hard limit sérül már olvasás / feldolgozás közben."""
+
+def _utf8_len(s: str) -> int:
+    """UTF-8 bájthossz teljes másolat nélkül (ASCII: len; különben darabonként kódolva)."""
+    if s.isascii():
+        return len(s)
+    return sum(len(s[i:i + _UTF8_CHUNK].encode("utf-8", "surrogatepass"))
+               for i in range(0, len(s), _UTF8_CHUNK))
+
 def _is_text(s: str) -> bool:
     # Heurisztika: ne legyen benne NUL
     return "\x00" not in s
@@ -69,7 +84,7 @@ def _validate_provenance(doc: Dict[str, Any], res: Result) -> None:
     if "prompt_header" in p and not isinstance(p.get("prompt_header"), str):
         res.add_error("provenance.prompt_header ha megadott, string legyen")
 
-def _validate_new_files(doc: Dict[str, Any], res: Result) -> None:
+def _validate_new_files(doc: Dict[str, Any], res: Result, sizes: Optional[Dict[int, int]] = None) -> None:
     nf = doc.get("new_files", [])
     if nf is None:
         return
@@ -94,7 +109,8 @@ def _validate_new_files(doc: Dict[str, Any], res: Result) -> None:
         # windows tiltott karakterek
         if any(ch in WINDOWS_FORBIDDEN for ch in path_nfc):
             res.add_error(f"new_files[{i}] tiltott karakter a fájlnévben: {path}")
-        total_bytes += len(content.encode("utf-8"))
+        n = sizes.get(id(it)) if sizes else None
+        total_bytes += n if n is not None else _utf8_len(content)
     # méretet a preflight fogja eldönteni; itt csak kalkulálunk, ha kell
     doc["_nf_total_bytes"] = total_bytes
 
@@ -110,13 +126,7 @@ def _validate_diff_unified(doc: Dict[str, Any], res: Result) -> None:
     # Nagyon alap unidiff jelzés (nem kötelező hibának venni)
     # if "@@ " not in diff and "diff --git" not in diff:
 
-def validate_json(payload: str) -> Result:
-    res = Result(ok=True)
-    try:
-        doc = json.loads(payload)
-    except Exception as e:
-        res.add_error(f"JSON parse hiba: {e}")
-        return res
+def _validate_doc(doc: Dict[str, Any], res: Result, sizes: Optional[Dict[int, int]] = None) -> None:
     # kulcsok, típusok
     _validate_top_keys(doc, res)
     if doc.get("schema_version") != "1":
@@ -129,15 +139,117 @@ def validate_json(payload: str) -> Result:
         res.add_error("commit_message kötelező szöveg")
     _validate_scope_size(doc, res)
     _validate_provenance(doc, res)
-    _validate_new_files(doc, res)
+    _validate_new_files(doc, res, sizes)
     _validate_diff_unified(doc, res)
     _validate_xor(doc, res)
+
+def validate_json(payload: str) -> Result:
+    res = Result(ok=True)
+    try:
+        doc = json.loads(payload)
+    except Exception as e:
+        res.add_error(f"JSON parse hiba: {e}")
+        return res
+    if not isinstance(doc, dict):
+        res.add_error("A csomag gyökere JSON objektum kell legyen")
+        return res
+    _validate_doc(doc, res)
     # nyers hossz eltárolása a preflightnak
     try:
-        doc["_raw_len"] = len(payload.encode("utf-8"))
+        doc["_raw_len"] = _utf8_len(payload)
     except Exception:
         doc["_raw_len"] = None
     # evidence
     if res.ok:
         res.add_evidence("Schema OK")
     return res
+
+def _read_capped(source: Union[bytes, bytearray, memoryview, BinaryIO], limit: int) -> Union[bytes, bytearray]:
+    """Bájtok beolvasása legfeljebb limit bájtig; túllépésnél _TooLarge (a maradék nem olvasódik)."""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        if len(source) > limit:
+            raise _TooLarge(f"A csomag nyers mérete meghaladja a {limit} bájtot.")
+        return source if not isinstance(source, memoryview) else source.tobytes()
+    buf = bytearray()
+    while True:
+        chunk = source.read(READ_CHUNK)
+        if not chunk:
+            return buf
+        if len(buf) + len(chunk) > limit:
+            raise _TooLarge(f"A csomag nyers mérete meghaladja a {limit} bájtot.")
+        buf += chunk
+
+def _check_new_files_size(doc: Dict[str, Any], sizes: Dict[int, int]) -> None:
+    """HARD_FILE_BYTES / HARD_TOTAL_BYTES csak a new_files tömb elemeire (_TooLarge)."""
+    nf = doc.get("new_files")
+    if not isinstance(nf, list):
+        return
+    total = 0
+    for it in nf:
+        n = sizes.get(id(it)) if isinstance(it, dict) else None
+        if n is None:
+            continue
+        if n > HARD_FILE_BYTES:
+            raise _TooLarge(f"Új fájl mérete meghaladja a {HARD_FILE_BYTES} bájtot: {it.get('path')}")
+        total += n
+        if total > HARD_TOTAL_BYTES:
+            raise _TooLarge(f"Új fájlok összmérete meghaladja az {HARD_TOTAL_BYTES} bájtot.")
+
+def load_package(source: Union[bytes, bytearray, memoryview, BinaryIO, str],
+                 max_bytes: int = HARD_PAYLOAD_BYTES) -> Tuple[Optional[Dict[str, Any]], Result]:
+    """Streaming validálás bájtokból / bináris fájlobjektumból (str is elfogadott).
+
+    - A nyers méretet olvasás közben számoljuk (nincs újrakódolás); max_bytes felett
+      az olvasás megáll.
+    - Feldolgozás közben (object_hook) a path+content objektumok UTF-8 mérete rögzül; a parse
+      után csak a new_files elemeire számít HARD_FILE_BYTES / HARD_TOTAL_BYTES (a validálás
+      túllépésnél el sem indul).
+    - Korai elutasításnál (None, Result(exit_code=EXIT_PRE)); különben a dokumentum
+      (_raw_len, _nf_total_bytes kitöltve, preflight-hoz) és a validate_json-nal azonos Result.
+    """
+    res = Result(ok=True)
+    try:
+        if isinstance(source, str):
+            raw_len = _utf8_len(source)
+            if raw_len > max_bytes:
+                raise _TooLarge(f"A csomag nyers mérete meghaladja a {max_bytes} bájtot.")
+            data: Union[str, bytes, bytearray] = source
+        else:
+            data = _read_capped(source, max_bytes)
+            raw_len = len(data)
+
+        sizes: Dict[int, int] = {}
+
+        def hook(obj: Dict[str, Any]) -> Dict[str, Any]:
+            # new_files elem jelölt: path + content sztring. Az object_hook nem látja a szülőt,
+            # ezért itt csak mérünk; a limitek a new_files tömb elemeire a parse után számítanak
+            content = obj.get("content")
+            if isinstance(content, str) and isinstance(obj.get("path"), str):
+                sizes[id(obj)] = _utf8_len(content)
+            return obj
+
+        try:
+            doc = json.loads(data, object_hook=hook)
+        except Exception as e:
+            res.add_error(f"JSON parse hiba: {e}")
+            return None, res
+        if isinstance(doc, dict):
+            _check_new_files_size(doc, sizes)
+    except _TooLarge as e:
+        res.add_error(str(e))
+        res.exit_code = EXIT_PRE
+        return None, res
+
+    if not isinstance(doc, dict):
+        res.add_error("A csomag gyökere JSON objektum kell legyen")
+        return None, res
+    _validate_doc(doc, res, sizes)
+    doc["_raw_len"] = raw_len
+    if res.ok:
+        res.add_evidence("Schema OK")
+    return doc, res
+
+def validate_stream(source: Union[bytes, bytearray, memoryview, BinaryIO, str],
+                    max_bytes: int = HARD_PAYLOAD_BYTES) -> Result:
+    """Mint validate_json, de bájtokon / fájlobjektumon, korai méret-elutasítással."""
+    return load_package(source, max_bytes)[1]
@@ -2,7 +2,7 @@
 from __future__ import annotations
 from pathlib import Path
 from typing import Tuple, List
-import sys
+import os, sys, tempfile
 
 def check_environment(base: Path) -> Tuple[bool, List[str]]:
     """
@@ -47,9 +47,13 @@ def check_environment(base: Path) -> Tuple[bool, List[str]]:
     out_dir = base / "out"
     try:
         out_dir.mkdir(parents=True, exist_ok=True)
-        test_file = out_dir / ".write_test.tmp"
-        test_file.write_text("ok", encoding="utf-8")
-        test_file.unlink(missing_ok=True)
+        # Futásonként egyedi próbafájl: párhuzamos futások nem törlik egymásét
+        fd, name = tempfile.mkstemp(prefix=".write_test-", suffix=".tmp", dir=out_dir)
+        try:
+            os.write(fd, b"ok")
+        finally:
+            os.close(fd)
+            os.unlink(name)
         msgs.append(f"Írási jog OK: {out_dir}")
     except Exception as e:
         ok = False
@@ -0,0 +1,51 @@
+"""Élő haladásjelzés a runnerből (strukturált események, szálbiztos fogyasztáshoz).
+
+A callback a worker szálon hívódik; a GUI queue.Queue-ba teszi és a Tk szálon olvassa.
+"""
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Callable, Optional
+import time
+
+@dataclass
+class ProgressEvent:
+    kind: str                           # "phase" (fázis indul) | "file" (haladás) | "done"
+    phase: str                          # preflight / fingerprint / package / evidence / done
+    files_done: int = 0
+    files_total: Optional[int] = None
+    bytes_done: int = 0
+    bytes_total: Optional[int] = None
+    current: str = ""                   # az épp feldolgozott fájl (relatív út)
+
+ProgressCallback = Optional[Callable[[ProgressEvent], None]]
+
+# Fájl-események között legalább ennyi idő telik el (a fogyasztó ne fulladjon el)
+MIN_INTERVAL_S = 0.05
+
+def emit_phase(cb: ProgressCallback, phase: str) -> None:
+    if cb is not None:
+        cb(ProgressEvent("phase", phase))
+
+class FileProgress:
+    """Fájlonkénti haladás ritkított továbbítása (MIN_INTERVAL_S, illetve az utolsó fájlnál mindig)."""
+
+    def __init__(self, cb: ProgressCallback, phase: str,
+                 files_total: Optional[int] = None, bytes_total: Optional[int] = None) -> None:
+        self.cb = cb
+        self.phase = phase
+        self.files_total = files_total
+        self.bytes_total = bytes_total
+        self.files_done = 0
+        self.bytes_done = 0
+        self._last = 0.0
+
+    def advance(self, current: str, nbytes: int) -> None:
+        self.files_done += 1
+        self.bytes_done += nbytes
+        if self.cb is None:
+            return
+        now = time.monotonic()
+        if now - self._last >= MIN_INTERVAL_S or self.files_done == self.files_total:
+            self._last = now
+            self.cb(ProgressEvent("file", self.phase, self.files_done, self.files_total,
+                                  self.bytes_done, self.bytes_total, current))
@@ -2,27 +2,141 @@
 from __future__ import annotations
 from pathlib import Path
 from datetime import datetime, timezone
-import hashlib, json
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+import hashlib, json, os, zipfile
+from .abort import AbortFlag, check
 
-def sha256_of(path: Path) -> str:
+EVIDENCE_NAME = "evidence.json"  # a run_once utolsó írása: a futás lezárását is jelzi
+
+def sha256_of(path: Path, abort_flag: AbortFlag = None) -> str:
+    """SHA-256 1 MiB-os blokkokban; abort_flag blokkonként ellenőrizve (Aborted)."""
     h = hashlib.sha256()
     with path.open("rb") as f:
-        for chunk in iter(lambda: f.read(1024*1024), b""):
+        for i, chunk in enumerate(iter(lambda: f.read(1024*1024), b"")):
+            check(abort_flag, "hash", i)
             h.update(chunk)
     return h.hexdigest()
 
-def make_evidence(zip_path: Path, entries: int, size: int) -> dict:
+class HashingWriter:
+    """Írás-tee: a továbbított bájtsor SHA-256-ja írás közben készül.
+    Csak szekvenciális írásnál érvényes; visszaugrás (seek) után hexdigest() None."""
+
+    def __init__(self, fp) -> None:
+        self._fp = fp
+        self._h = hashlib.sha256()
+        self._pos = 0
+        self._end = 0
+        self._valid = True
+
+    def write(self, b) -> int:
+        if self._pos != self._end:
+            self._valid = False
+        n = self._fp.write(b)
+        if self._valid:
+            self._h.update(b)
+        self._pos += len(b)
+        self._end = max(self._end, self._pos)
+        return n
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        self._pos = self._fp.seek(offset, whence)
+        return self._pos
+
+    def flush(self) -> None:
+        self._fp.flush()
+
+    def hexdigest(self) -> str | None:
+        return self._h.hexdigest() if self._valid else None
+
+def _entry_record(zf: zipfile.ZipFile, info: zipfile.ZipInfo) -> dict:
+    h = hashlib.sha256()
+    with zf.open(info, "r") as f:
+        for chunk in iter(lambda: f.read(1024*1024), b""):
+            h.update(chunk)
+    return {"path": info.filename, "size": info.file_size, "crc32": f"{info.CRC:08x}", "sha256": h.hexdigest()}
+
+def entry_manifest(zip_path: Path, jobs: int = 0) -> List[dict]:
+    """Bejegyzésenkénti lista (path, size, crc32, sha256) a zip-ből, párhuzamos hasheléssel
+    (jobs <= 0 = CPU-szám). Zip-sorrendben."""
+    # Egyetlen megnyitás: a ZipFile olvasása szálbiztos (a közös fájlmutatót zár védi,
+    # a kitömörítés és a hash párhuzamosan fut)
+    with zipfile.ZipFile(zip_path, "r") as zf:
+        infos = [i for i in zf.infolist() if not i.is_dir()]
+        workers = (os.cpu_count() or 1) if jobs <= 0 else jobs
+        if workers <= 1 or len(infos) <= 1:
+            return [_entry_record(zf, i) for i in infos]
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(lambda i: _entry_record(zf, i), infos))
+
+def files_from_manifest(manifest: Dict[str, dict]) -> List[dict]:
+    """A packager manifest.json-jából ugyanaz a lista, mint az entry_manifest-ből – újraolvasás nélkül."""
+    return [{"path": p, "size": int(m["size"]), "crc32": f"{int(m['crc32']):08x}", "sha256": m["sha256"]}
+            for p, m in manifest.items()]
+
+def _leaf(rec: dict) -> bytes:
+    data = f"{rec['path']}\0{rec['size']}\0{rec['crc32']}\0{rec['sha256']}".encode("utf-8")
+    return hashlib.sha256(b"\x00" + data).digest()
+
+def merkle_root(files: List[dict]) -> str:
+    """Merkle-gyök a bejegyzéslista fölött (levél: 0x00||rekord, belső csúcs: 0x01||bal||jobb).
+    Páratlan csúcs változatlanul lép feljebb (nincs duplikálás)."""
+    level = [_leaf(r) for r in files]
+    if not level:
+        return hashlib.sha256(b"").hexdigest()
+    while len(level) > 1:
+        nxt = [hashlib.sha256(b"\x01" + level[i] + level[i + 1]).digest() for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            nxt.append(level[-1])
+        level = nxt
+    return level[0].hex()
+
+def verify_entry(zip_path: Path, evidence: dict, path: str) -> bool:
+    """Egyetlen bejegyzés ellenőrzése a bizonyíték alapján (csak azt az egy fájlt olvassa)."""
+    rec = next((r for r in evidence.get("files") or [] if r.get("path") == path), None)
+    if rec is None:
+        return False
+    with zipfile.ZipFile(zip_path, "r") as zf:
+        try:
+            info = zf.getinfo(path)
+        except KeyError:
+            return False
+        return _entry_record(zf, info) == rec
+
+def diff_evidence(old: dict, new: dict) -> Dict[str, List[str]]:
+    """Két futás bejegyzéslistájának összevetése: {added, removed, changed} útvonalak."""
+    if old.get("merkle_root") and old.get("merkle_root") == new.get("merkle_root"):
+        return {"added": [], "removed": [], "changed": []}
+    a = {r["path"]: r for r in old.get("files") or []}
+    b = {r["path"]: r for r in new.get("files") or []}
+    return {
+        "added": sorted(set(b) - set(a)),
+        "removed": sorted(set(a) - set(b)),
+        "changed": sorted(p for p in set(a) & set(b) if a[p] != b[p]),
+    }
+
+def make_evidence(zip_path: Path, entries: int, size: int, sha256: str | None = None,
+                  files: Optional[List[dict]] = None) -> dict:
+    """Bizonyíték dict; ha a sha256 már ismert (pl. a packager tee-jéből), nem olvassuk újra a zip-et.
+    files: bejegyzésenkénti lista (path, size, crc32, sha256); ha nincs megadva, a zip-ből készül."""
     ts = datetime.now(timezone.utc).isoformat()
+    if files is None:
+        files = entry_manifest(zip_path)
     return {
         "zip": str(zip_path.resolve()),
-        "sha256": sha256_of(zip_path),
+        "sha256": sha256 or sha256_of(zip_path),
         "entries": int(entries),
         "size": int(size),
         "ts_utc": ts,
+        "merkle_root": merkle_root(files),
+        "files": files,
     }
 
 def write_evidence_json(evidence: dict, dest_dir: Path) -> Path:
     dest_dir.mkdir(parents=True, exist_ok=True)
-    p = dest_dir / "evidence.json"
+    p = dest_dir / EVIDENCE_NAME
     p.write_text(json.dumps(evidence, ensure_ascii=False, indent=2), encoding="utf-8")
     return p
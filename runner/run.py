@@ -1,13 +1,17 @@
 
 from __future__ import annotations
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Callable, List
+from typing import Callable, Dict, List, Optional
 from .preflight import check_environment
-from .packager import make_package
-from .proof import sha256_of, make_evidence, write_evidence_json
+from .packager import make_package, find_previous_package, tree_fingerprint, load_manifest, DEFAULT_PROFILE
+from . import build_cache
+from .history import HistoryStore
+from .abort import Aborted, check
+from .progress import ProgressCallback, ProgressEvent, emit_phase
+from .proof import make_evidence, write_evidence_json, files_from_manifest
 from datetime import datetime, timezone
-import json
+import secrets, shutil, threading, time
 
 @dataclass
 class RunResult:
@@ -19,53 +23,161 @@ class RunResult:
     size: int|None
     logs: List[str]
     summary: str
+    # Fázisidők (monotonic, s) és átviteli mutatók, ld. _metrics
+    metrics: Dict[str, object] = field(default_factory=dict)
+    run_id: Optional[str] = None
 
-def _utc_stamp_minute() -> str:
-    now = datetime.now(timezone.utc)
-    return now.strftime("%Y%m%dT%H%MZ")
+_id_lock = threading.Lock()
+_last_us = 0
 
-def run_once(plan_text: str, abort_flag: Callable[[], bool], base: Path) -> RunResult:
+def new_run_id() -> str:
+    """Egyedi futás-azonosító: UTC idő µs-ig (folyamaton belül szigorúan monoton) + véletlen utótag.
+    Pl. 20261018T154600123456Z-3fa9c1; névsorrend = indítási sorrend."""
+    global _last_us
+    with _id_lock:
+        us = max(time.time_ns() // 1000, _last_us + 1)
+        _last_us = us
+    secs, frac = divmod(us, 1_000_000)
+    stamp = datetime.fromtimestamp(secs, timezone.utc).strftime("%Y%m%dT%H%M%S")
+    return f"{stamp}{frac:06d}Z-{secrets.token_hex(3)}"
+
+def _metrics(phases: Dict[str, float], t_start: float, files: int = 0,
+             bytes_read: int = 0, bytes_written: int = 0, cached: bool = False) -> Dict[str, object]:
+    """Strukturált futási mutatók; a *_per_s értékek a csomagolási fázisra vonatkoznak."""
+    pack_s = phases.get("package") or 0.0
+    return {
+        "phases_s": {k: round(v, 6) for k, v in phases.items()},
+        "total_s": round(time.monotonic() - t_start, 6),
+        "files": files,
+        "bytes_read": bytes_read,
+        "bytes_written": bytes_written,
+        "files_per_s": round(files / pack_s, 1) if pack_s else None,
+        "read_bytes_per_s": round(bytes_read / pack_s) if pack_s else None,
+        "write_bytes_per_s": round(bytes_written / pack_s) if pack_s else None,
+        "compression_ratio": round(bytes_written / bytes_read, 4) if bytes_read else None,
+        "cached": cached,
+    }
+
+def _fail(error: str, summary: str, logs: List[str], phases: Dict[str, float], t_start: float,
+          aborted_at: Optional[Dict[str, object]] = None) -> RunResult:
+    metrics = _metrics(phases, t_start)
+    if aborted_at is not None:
+        metrics["aborted_at"] = aborted_at
+    return RunResult(False, error, None, None, None, None, logs, summary, metrics)
+
+def _finish(out_dir: Path, ev: dict, logs: List[str], metrics: Dict[str, object], cached: bool = False,
+            progress: ProgressCallback = None, run_id: Optional[str] = None) -> RunResult:
+    sha, entries, size = ev["sha256"], int(ev["entries"]), int(ev["size"])
+    summary = f"Csomag elkészült — ENTRIES={entries}, SIZE={size}, SHA={sha[:7]}…"
+    hist_line = dict(ev)
+    hist_line.pop("zip_mtime_ns", None)
+    hist_line.pop("files", None)
+    if cached:
+        hist_line.update({"ts_utc": datetime.now(timezone.utc).isoformat(), "cached": True})
+    hist_line.update({"summary": summary, "ok": True, "metrics": metrics, "run_id": run_id})
+    HistoryStore(out_dir).append(hist_line)
+
+    logs.append("Kész.")
+    if progress is not None:
+        progress(ProgressEvent("done", "done", entries, entries))
+    return RunResult(True, None, str(Path(ev["zip"]).resolve()), sha, entries, size, logs, summary, metrics)
+
+def run_once(plan_text: str, abort_flag: Callable[[], bool], base: Path,
+             profile: str = DEFAULT_PROFILE, progress: ProgressCallback = None,
+             run_id: Optional[str] = None) -> RunResult:
+    """Egy futás: előkészítés → fingerprint/gyorsítótár → csomagolás → bizonyíték.
+    progress: ProgressEvent callback (a hívó szálán fut, ld. runner.progress).
+    run_id: a futási mappa neve out/run-<run_id> (alapból new_run_id()); párhuzamos
+    futások így nem írják felül egymás mappáját."""
+    run_id = run_id or new_run_id()
+    res = _run_once(plan_text, abort_flag, base, profile, progress, run_id)
+    res.run_id = run_id
+    return res
+
+def _run_once(plan_text: str, abort_flag: Callable[[], bool], base: Path,
+              profile: str, progress: ProgressCallback, run_id: str) -> RunResult:
     logs: List[str] = []
+    phases: Dict[str, float] = {}
+    t_start = time.monotonic()
+    stage = "start"
+    created_dir: Optional[Path] = None
     try:
-        if abort_flag():
-            return RunResult(False, "Megszakítva", None, None, None, None, logs, "Megszakítva.")
+        check(abort_flag, stage)
 
         logs.append("Előkészítés…")
+        stage = "preflight"
+        emit_phase(progress, stage)
+        t = time.monotonic()
         ok, msgs = check_environment(base)
+        phases["preflight"] = time.monotonic() - t
         logs.extend(msgs)
         if not ok:
-            return RunResult(False, "Előkészítés sikertelen", None, None, None, None, logs, "Hiba: előkészítés sikertelen.")
+            return _fail("Előkészítés sikertelen", "Hiba: előkészítés sikertelen.", logs, phases, t_start)
 
-        if abort_flag():
-            return RunResult(False, "Megszakítva", None, None, None, None, logs, "Megszakítva.")
+        check(abort_flag, stage)
 
         logs.append("Csomagolás…")
         out_dir = base / "out"
-        run_dir = out_dir / f"run-{_utc_stamp_minute()}"
-        run_dir.mkdir(parents=True, exist_ok=True)
-
         include_dirs = ["gui", "PRPs", "EXAMPLES", "GUIDES"]
         exclude_globs = ["**/__pycache__/**", "**/*.pyc", ".git/**", "out/**"]
-        zip_path, entries, size = make_package(base, include_dirs, exclude_globs, run_dir)
 
-        if abort_flag():
-            return RunResult(False, "Megszakítva", None, None, None, None, logs, "Megszakítva.")
+        # Változatlan bemenet esetén a korábbi csomag bizonyítékát adjuk vissza
+        stage = "fingerprint"
+        emit_phase(progress, stage)
+        t = time.monotonic()
+        fingerprint, cacheable, n_files, n_bytes = tree_fingerprint(base, include_dirs, exclude_globs,
+                                                                    profile=profile, abort_flag=abort_flag)
+        cached = build_cache.lookup(out_dir, fingerprint)
+        phases["fingerprint"] = time.monotonic() - t
+        if cached is not None:
+            logs.append("Bemenet változatlan — korábbi csomag újrahasznosítva (nincs újracsomagolás).")
+            return _finish(out_dir, cached, logs, _metrics(phases, t_start, int(cached["entries"]), cached=True),
+                           cached=True, progress=progress, run_id=run_id)
 
-        logs.append("Ellenőrzés…")
-        sha = sha256_of(zip_path)
-        ev = make_evidence(zip_path, entries, size)
-        write_evidence_json(ev, run_dir)
+        stage = "package"
+        emit_phase(progress, stage)
+        t = time.monotonic()
+        previous = find_previous_package(out_dir)
+        run_dir = out_dir / f"run-{run_id}"
+        run_dir.mkdir(parents=True)  # egyedi azonosító: létező mappa = ütközés, hiba
+        created_dir = run_dir
+        zip_path, entries, size, sha = make_package(base, include_dirs, exclude_globs, run_dir,
+                                                    previous=previous, jobs=0, profile=profile,
+                                                    abort_flag=abort_flag, progress=progress,
+                                                    totals=(n_files, n_bytes))
+        phases["package"] = time.monotonic() - t
 
-        hist_line = dict(ev)
-        hist_line.update({"summary": f"Csomag elkészült — ENTRIES={entries}, SIZE={size}, SHA={sha[:7]}…", "ok": True})
-        with (out_dir / "history.jsonl").open("a", encoding="utf-8") as hf:
-            hf.write(json.dumps(hist_line, ensure_ascii=False) + "\n")
+        stage = "evidence"
+        check(abort_flag, stage)
+        emit_phase(progress, stage)
 
-        logs.append("Kész.")
+        logs.append("Ellenőrzés…")
+        t = time.monotonic()
+        manifest = load_manifest(run_dir)
+        files = files_from_manifest(manifest) if len(manifest) == entries else None
+        ev = make_evidence(zip_path, entries, size, sha256=sha, files=files)
+        phases["evidence"] = time.monotonic() - t
+        bytes_read = sum(int(f["size"]) for f in ev["files"])
+        ev["metrics"] = metrics = _metrics(phases, t_start, entries, bytes_read, size)
+        write_evidence_json(ev, run_dir)
+        created_dir = None  # a futási mappa teljes, innentől nem takarítjuk
+        if cacheable:
+            build_cache.store(out_dir, fingerprint, ev)
 
-        summary = f"Csomag elkészült — ENTRIES={entries}, SIZE={size}, SHA={sha[:7]}…"
-        return RunResult(True, None, str(zip_path.resolve()), sha, entries, size, logs, summary)
+        logs.append("Idők: " + ", ".join(f"{k}={v:.3f}s" for k, v in phases.items())
+                    + f" — {metrics['files_per_s'] or 0} fájl/s, arány={metrics['compression_ratio']}")
+        return _finish(out_dir, ev, logs, metrics, progress=progress, run_id=run_id)
 
+    except Aborted as e:
+        # Félkész futási mappa eltávolítása (csak ha ez a futás hozta létre)
+        if created_dir is not None:
+            shutil.rmtree(created_dir, ignore_errors=True)
+        phase = e.phase or stage
+        logs.append(f"Megszakítva a(z) {phase} fázisban (kész egységek: {e.done}).")
+        return _fail("Megszakítva", "Megszakítva.", logs, phases, t_start,
+                     aborted_at={"phase": phase, "done": e.done})
     except Exception as e:
+        if created_dir is not None:
+            shutil.rmtree(created_dir, ignore_errors=True)
         logs.append(f"Hiba: {e!r}")
-        return RunResult(False, str(e), None, None, None, None, logs, f"Hiba: {e}")
+        return _fail(str(e), f"Hiba: {e}", logs, phases, t_start)
@@ -0,0 +1,169 @@
+"""Futásütemező: run_once feladatok korlátos szálkészleten (sorban álló + párhuzamos futások).
+
+- submit → egyedi futás-azonosító (run.new_run_id), ez a futási mappa neve is (out/run-<id>)
+- cancel(job_id): sorban álló feladat el sem indul, futó feladat kooperatívan áll le
+  (run_once abort_flag-je a feladat saját eseménye)
+- status / jobs: pillanatkép (JobInfo), bármely szálról hívható
+- on_done: a worker szálán fut; GUI-ból a hívó tegye át a saját szálára (pl. after/queue)
+"""
+from __future__ import annotations
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+import os, threading, time
+
+from .packager import DEFAULT_PROFILE
+from .progress import ProgressCallback
+from .run import RunResult, new_run_id, run_once
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+FINAL_STATES = (DONE, FAILED, CANCELLED)
+
+# Alapértelmezett párhuzamosság: a csomagolás maga is többszálú, ezért kevés egyidejű futás
+DEFAULT_WORKERS = max(1, min(2, os.cpu_count() or 1))
+# Ennyi lezárt feladat adatai maradnak lekérdezhetők
+KEEP_FINISHED = 100
+
+@dataclass
+class JobInfo:
+    job_id: str
+    status: str
+    submitted: float
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    cancel_requested: bool = False
+    result: Optional[RunResult] = None
+
+@dataclass
+class _Job:
+    info: JobInfo
+    plan_text: str
+    base: Path
+    profile: str
+    progress: ProgressCallback
+    on_done: Optional[Callable[[JobInfo], None]]
+    cancel: threading.Event = field(default_factory=threading.Event)
+    future: Optional[Future] = None
+
+class Scheduler:
+    def __init__(self, max_workers: int = DEFAULT_WORKERS) -> None:
+        self.max_workers = max(1, int(max_workers))
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="run")
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, _Job] = {}
+        self._closed = False
+
+    def submit(self, plan_text: str, base: Path, profile: str = DEFAULT_PROFILE,
+               progress: ProgressCallback = None,
+               on_done: Optional[Callable[[JobInfo], None]] = None) -> str:
+        """Új futás sorba állítása; vissza: a feladat (és futási mappa) azonosítója."""
+        job_id = new_run_id()
+        job = _Job(JobInfo(job_id, QUEUED, time.time()), plan_text, Path(base), profile, progress, on_done)
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Az ütemező le van állítva.")
+            self._jobs[job_id] = job
+            job.future = self._pool.submit(self._run, job)
+        return job_id
+
+    def _run(self, job: _Job) -> None:
+        with self._lock:
+            if job.cancel.is_set():
+                self._close(job, CANCELLED, None)
+                notify = True
+            else:
+                job.info.status, job.info.started = RUNNING, time.time()
+                notify = False
+        if notify:
+            self._notify(job)
+            return
+        try:
+            res = run_once(job.plan_text, abort_flag=job.cancel.is_set, base=job.base,
+                           profile=job.profile, progress=job.progress, run_id=job.info.job_id)
+        except Exception as e:  # run_once maga nem dob; védőháló a workernek
+            res = RunResult(False, str(e), None, None, None, None, [f"Hiba: {e!r}"], f"Hiba: {e}",
+                            run_id=job.info.job_id)
+        if res.ok:
+            status = DONE
+        elif "aborted_at" in res.metrics:
+            status = CANCELLED
+        else:
+            status = FAILED
+        with self._lock:
+            self._close(job, status, res)
+        self._notify(job)
+
+    def _close(self, job: _Job, status: str, res: Optional[RunResult]) -> None:
+        job.info.status, job.info.finished, job.info.result = status, time.time(), res
+        # Régi lezárt feladatok eldobása (beszúrási sorrend = indítási sorrend)
+        finished = [k for k, j in self._jobs.items() if j.info.status in FINAL_STATES]
+        for k in finished[:max(0, len(finished) - KEEP_FINISHED)]:
+            del self._jobs[k]
+
+    def _notify(self, job: _Job) -> None:
+        if job.on_done is not None:
+            try:
+                job.on_done(self._snapshot(job))
+            except Exception:
+                pass
+
+    @staticmethod
+    def _snapshot(job: _Job) -> JobInfo:
+        i = job.info
+        return JobInfo(i.job_id, i.status, i.submitted, i.started, i.finished, job.cancel.is_set(), i.result)
+
+    def cancel(self, job_id: str) -> bool:
+        """Megszakítás kérése; False, ha nincs ilyen vagy már lezárt feladat."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.info.status in FINAL_STATES:
+                return False
+            job.cancel.set()
+            # Még el sem indult: a készlet sorából is kivesszük
+            if job.info.status == QUEUED and job.future is not None and job.future.cancel():
+                self._close(job, CANCELLED, None)
+                notify = True
+            else:
+                notify = False
+        if notify:
+            self._notify(job)
+        return True
+
+    def cancel_all(self) -> int:
+        with self._lock:
+            ids = [k for k, j in self._jobs.items() if j.info.status not in FINAL_STATES]
+        return sum(1 for k in ids if self.cancel(k))
+
+    def status(self, job_id: str) -> Optional[JobInfo]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return self._snapshot(job) if job is not None else None
+
+    def jobs(self, active_only: bool = False) -> List[JobInfo]:
+        """Feladatok pillanatképe indítási sorrendben."""
+        with self._lock:
+            return [self._snapshot(j) for j in self._jobs.values()
+                    if not active_only or j.info.status not in FINAL_STATES]
+
+    def active_count(self) -> int:
+        return len(self.jobs(active_only=True))
+
+    def wait(self, job_id: str, timeout: Optional[float] = None) -> Optional[JobInfo]:
+        """Blokkoló várakozás egy feladat lezárására (CLI / benchmark használatra)."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None or job.future is None:
+            return None
+        try:
+            job.future.result(timeout)
+        except Exception:
+            pass
+        return self.status(job_id)
+
+    def shutdown(self, cancel: bool = True, wait: bool = True) -> None:
+        with self._lock:
+            self._closed = True
+        if cancel:
+            self.cancel_all()
+        self._pool.shutdown(wait=wait)
@@ -0,0 +1,13 @@
+"""Közös időmérő segéd a benchmarkokhoz (runner.bench, gui.sanitize_bench)."""
+from __future__ import annotations
+import time
+from typing import Callable, Dict, List
+
+def timed(fn: Callable[[], object], repeat: int) -> Dict[str, object]:
+    """fn futtatása repeat-szer; vissza: {"s": legjobb idő, "runs": minden futás} másodpercben."""
+    runs: List[float] = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        runs.append(time.perf_counter() - t0)
+    return {"s": round(min(runs), 6), "runs": [round(r, 6) for r in runs]}
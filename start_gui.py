@@ -1,3 +1,8 @@
-from gui.app import main
+import time
+_T0 = time.perf_counter()  # időmérés kezdőpontja: a szkript első utasítása
+from gui import startup
+startup.set_origin(_T0)
+with startup.span("import_gui_app"):
+    from gui.app import main
 if __name__ == '__main__':
-    main()
+    raise SystemExit(main())
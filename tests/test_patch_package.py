@@ -0,0 +1,74 @@
+"""Regressziós tesztek a runner.patch_package ellenőrzéseihez (pytest)."""
+import json, subprocess
+from pathlib import Path
+
+import pytest
+
+from runner.patch_package import git_utils
+
+
+def _git(repo: Path, *args: str) -> str:
+    return subprocess.run(["git", *args], cwd=repo, check=True, capture_output=True, text=True).stdout.strip()
+
+
+@pytest.fixture
+def repo(tmp_path: Path) -> Path:
+    _git(tmp_path, "init", "-q")
+    (tmp_path / "a.txt").write_text("a\n", encoding="utf-8")
+    _git(tmp_path, "add", "a.txt")
+    _git(tmp_path, "-c", "user.name=t", "-c", "user.email=t@t", "commit", "-q", "-m", "init")
+    yield tmp_path
+    git_utils.close_all()
+
+
+def test_commit_exists_rejects_rev_with_space(repo: Path):
+    # "x commit" → a batch-check válasza "x commit missing": nem lehet "commit" típus
+    assert not git_utils.commit_exists("nonexistent commit", str(repo))
+    assert not git_utils.commit_exists("HEAD\tcommit", str(repo))
+    assert not git_utils.commit_exists("nonexistent", str(repo))
+    assert git_utils.commit_exists(_git(repo, "rev-parse", "HEAD"), str(repo))
+
+
+def _package(**extra) -> dict:
+    doc = {
+        "schema_version": "1",
+        "base_branch": "main",
+        "base_commit_sha": "0" * 40,
+        "commit_message": "teszt",
+        "scope_size": {"files": 1, "lines": 1},
+        "provenance": {"llm_vendor": "v", "llm_model": "m", "timestamp_utc": "2026-01-01T00:00:00Z"},
+    }
+    doc.update(extra)
+    return doc
+
+
+def test_escape_heavy_new_files_within_decoded_limits_pass():
+    # Vezérlőkarakter: 1 dekódolt bájt → 6 bájt JSON-ban ("\u001f"); a dekódolt limitek alatt
+    # a nyers méret nem okozhat elutasítást
+    from runner.patch_package.preflight import HARD_FILE_BYTES, HARD_TOTAL_BYTES
+    from runner.patch_package.validator import load_package
+    sizes = [HARD_FILE_BYTES - 1, HARD_FILE_BYTES - 1]
+    sizes.append(HARD_TOTAL_BYTES - sum(sizes))
+    files = [{"path": f"f{i}.txt", "mode": "100644", "content": "\x1f" * n} for i, n in enumerate(sizes)]
+    payload = json.dumps(_package(new_files=files)).encode("utf-8")
+    assert len(payload) > 5 * HARD_TOTAL_BYTES
+    doc, res = load_package(payload)
+    assert res.ok, res.errors
+    assert doc["_nf_total_bytes"] == HARD_TOTAL_BYTES
+    assert doc["_raw_len"] == len(payload)
+
+
+def test_preflight_rejects_nested_git_dir(repo: Path):
+    from runner.patch_package.preflight import preflight
+    diff = (
+        "diff --git a/vendor/sub/.git/config b/vendor/sub/.git/config\n"
+        "--- a/vendor/sub/.git/config\n"
+        "+++ b/vendor/sub/.git/config\n"
+        "@@ -1 +1 @@\n"
+        "-a\n"
+        "+b\n"
+    )
+    doc = _package(diff_unified=diff, base_commit_sha=_git(repo, "rev-parse", "HEAD"))
+    res = preflight(doc, cwd=str(repo))
+    assert not res.ok
+    assert any("Denylist" in e and ".git/" in e for e in res.errors), res.errors